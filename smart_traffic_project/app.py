@@ -4,13 +4,11 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime, timedelta
 import os
 import sys
 
-from ml_models import TrafficPredictor
+from ml_models import TrafficPredictor, FORECAST_HORIZONS, read_dataset
 from weather_api import WeatherAPI
 from data_generator import generate_traffic_dataset
 
@@ -65,13 +63,13 @@ def load_and_prepare_data():
         df = generate_traffic_dataset(5000)
         df.to_csv('traffic_data.csv', index=False)
     else:
-        df = pd.read_csv('traffic_data.csv')
+        df = read_dataset('traffic_data.csv')
     return df
 
 @st.cache_resource
 def initialize_predictor():
     """Initialize and train the predictor"""
-    predictor = TrafficPredictor()
+    predictor = TrafficPredictor(cache_size=1024)
     
     if not predictor.load_models():
         st.info("Training ML models... This may take a moment.")
@@ -199,6 +197,15 @@ def show_live_prediction(predictor, weather_api):
         </div>
         """, unsafe_allow_html=True)
         
+        if predictor.has_horizon_model():
+            forecasts = predictor.predict_horizons_batch([[
+                hour_input, day_of_week, is_weekend_calc, rain_input, temp_input,
+                humidity_input, 1 if event_flag else 0, rush_hour_calc, avg_speed_input
+            ]])[0]
+            st.subheader(" Upcoming Traffic")
+            for column, minutes, forecast in zip(st.columns(len(FORECAST_HORIZONS)), FORECAST_HORIZONS, forecasts):
+                column.metric(f"+{minutes} min", f"{forecast:.0f}", f"{forecast - predicted_traffic:+.0f}")
+        
         st.subheader(" Recommendations")
         
         recommendations = []
@@ -273,18 +280,39 @@ def show_model_analysis(predictor, df):
     st.subheader(" Feature Importance (Random Forest)")
     
     feature_importance = predictor.get_feature_importance()
+    permutation_importance = predictor.get_permutation_importance()
     if feature_importance is not None:
-        fig_importance = px.bar(
-            feature_importance, 
-            x='importance', 
-            y='feature', 
-            orientation='h',
-            title="Which factors affect traffic most?",
-            color='importance',
-            color_continuous_scale="plasma"
-        )
-        fig_importance.update_layout(height=400)
-        st.plotly_chart(fig_importance, use_container_width=True)
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            fig_importance = px.bar(
+                feature_importance, 
+                x='importance', 
+                y='feature', 
+                orientation='h',
+                title="Which factors affect traffic most? (impurity)",
+                color='importance',
+                color_continuous_scale="plasma"
+            )
+            fig_importance.update_layout(height=400)
+            st.plotly_chart(fig_importance, use_container_width=True)
+        
+        with col2:
+            if permutation_importance is not None:
+                fig_permutation = px.bar(
+                    permutation_importance, 
+                    x='importance', 
+                    y='feature', 
+                    orientation='h',
+                    error_x='std',
+                    title="Drop in R² when a factor is shuffled (permutation)",
+                    color='importance',
+                    color_continuous_scale="plasma"
+                )
+                fig_permutation.update_layout(height=400)
+                st.plotly_chart(fig_permutation, use_container_width=True)
+            else:
+                st.info("Permutation importance is computed when the models are trained.")
         
         st.subheader(" Key Insights")
         top_feature = feature_importance.iloc[0]
@@ -393,24 +421,25 @@ def show_route_comparison(predictor, weather_api):
         
         route_results = []
         
-        for route in routes:
-            day_of_week = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"].index(scenario_day)
-            is_weekend = 1 if day_of_week >= 5 else 0
-            rush_hour = 1 if (7 <= scenario_hour <= 9) or (17 <= scenario_hour <= 19) else 0
-            
-            adjusted_speed = route["base_speed"] * (1 - scenario_rain * 0.3)
-            
-            predicted_traffic = predictor.predict_traffic(
-                hour=scenario_hour,
-                day_of_week=day_of_week,
-                is_weekend=is_weekend,
-                rain_intensity=scenario_rain,
-                temperature=weather_data['temperature'],
-                humidity=weather_data['humidity'],
-                event_flag=1 if scenario_event else 0,
-                rush_hour=rush_hour,
-                avg_speed=adjusted_speed
-            ) * route["traffic_factor"]
+        day_of_week = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"].index(scenario_day)
+        is_weekend = 1 if day_of_week >= 5 else 0
+        rush_hour = 1 if (7 <= scenario_hour <= 9) or (17 <= scenario_hour <= 19) else 0
+        
+        route_scenarios = pd.DataFrame({
+            'hour': scenario_hour,
+            'day_of_week': day_of_week,
+            'is_weekend': is_weekend,
+            'rain_intensity': scenario_rain,
+            'temperature': weather_data['temperature'],
+            'humidity': weather_data['humidity'],
+            'event_flag': 1 if scenario_event else 0,
+            'rush_hour': rush_hour,
+            'avg_speed': [route["base_speed"] * (1 - scenario_rain * 0.3) for route in routes]
+        })
+        route_predictions = predictor.predict_traffic_batch(route_scenarios)
+        
+        for route, adjusted_speed, base_traffic in zip(routes, route_scenarios['avg_speed'], route_predictions):
+            predicted_traffic = base_traffic * route["traffic_factor"]
             
             route_score = predictor.calculate_route_score(
                 predicted_traffic=predicted_traffic,
@@ -435,31 +464,27 @@ def show_route_comparison(predictor, weather_api):
     
     st.subheader(" Traffic Prediction Throughout the Day")
     
-    hourly_predictions = []
-    for hour in range(24):
-        day_of_week = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"].index(scenario_day)
-        is_weekend = 1 if day_of_week >= 5 else 0
-        rush_hour = 1 if (7 <= hour <= 9) or (17 <= hour <= 19) else 0
-        
-        traffic_pred = predictor.predict_traffic(
-            hour=hour,
-            day_of_week=day_of_week,
-            is_weekend=is_weekend,
-            rain_intensity=scenario_rain,
-            temperature=weather_data['temperature'],
-            humidity=weather_data['humidity'],
-            event_flag=1 if scenario_event else 0,
-            rush_hour=rush_hour,
-            avg_speed=35
-        )
-        
-        hourly_predictions.append({
-            'Hour': hour,
-            'Traffic Flow': traffic_pred,
-            'Period': 'Rush Hour' if rush_hour else 'Normal'
-        })
-    
-    hourly_df = pd.DataFrame(hourly_predictions)
+    day_of_week = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"].index(scenario_day)
+    hours = np.arange(24)
+    rush_hours = (((7 <= hours) & (hours <= 9)) | ((17 <= hours) & (hours <= 19))).astype(int)
+    
+    hourly_scenarios = pd.DataFrame({
+        'hour': hours,
+        'day_of_week': day_of_week,
+        'is_weekend': 1 if day_of_week >= 5 else 0,
+        'rain_intensity': scenario_rain,
+        'temperature': weather_data['temperature'],
+        'humidity': weather_data['humidity'],
+        'event_flag': 1 if scenario_event else 0,
+        'rush_hour': rush_hours,
+        'avg_speed': 35
+    })
+    
+    hourly_df = pd.DataFrame({
+        'Hour': hours,
+        'Traffic Flow': predictor.predict_traffic_batch(hourly_scenarios),
+        'Period': np.where(rush_hours == 1, 'Rush Hour', 'Normal')
+    })
     
     fig_hourly = px.line(
         hourly_df, 
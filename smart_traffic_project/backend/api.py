@@ -2,26 +2,54 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import sys
 import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import threading
+import time
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_DIR)
 
-from ml_models import TrafficPredictor
+from ml_models import TrafficPredictor, FEATURE_COLUMNS, TARGET_COLUMN, FORECAST_HORIZONS, GRID_MAX_ERROR
 from weather_api import WeatherAPI
 from maps_service import MapsService
-import pandas as pd
 import numpy as np
 
 app = Flask(__name__)
 CORS(app)
 
+# Dataset and model registry paths are relative to the project directory
+os.chdir(os.environ.get('TRAFFIC_PROJECT_DIR', PROJECT_DIR))
+# How often requests check whether the registry's CURRENT version moved
+VERSION_CHECK_INTERVAL = float(os.environ.get('MODEL_VERSION_CHECK_INTERVAL', 5))
+
+# Spread of the forest's per-tree predictions reported with each prediction
+PREDICTION_INTERVAL = (0.1, 0.9)
+# Routes are ranked on predicted traffic + ROUTE_RISK_AVERSION standard deviations
+ROUTE_RISK_AVERSION = float(os.environ.get('ROUTE_RISK_AVERSION', 1.0))
+# Above this spread (vehicles/hour) a prediction is flagged as uncertain
+UNCERTAIN_TRAFFIC_STD = 100
+
+def create_predictor():
+    return TrafficPredictor(
+        backend=os.environ.get('PREDICTION_BACKEND', 'compiled'),
+        cache_size=int(os.environ.get('PREDICTION_CACHE_SIZE', 4096)),
+        cache_ttl=float(os.environ.get('PREDICTION_CACHE_TTL', 300)),
+        segment_memory_budget=int(float(os.environ.get('SEGMENT_MEMORY_BUDGET_MB', 64)) * 2**20),
+        knn_backend=os.environ.get('KNN_BACKEND'),
+        grid_max_error=float(os.environ.get('GRID_MAX_ERROR', GRID_MAX_ERROR))
+    )
+
 # Initialize services
-predictor = TrafficPredictor()
+predictor = create_predictor()
 weather_api = WeatherAPI()
 maps_service = MapsService()
+metrics_lock = threading.Lock()
+# Background re-evaluation started by /api/models when the dataset changed
+metrics_thread = None
+swap_lock = threading.Lock()
+last_version_check = time.monotonic()
 
 # Load models on startup
 try:
-    os.chdir('/Users/surjithsshetty/Desktop/smart_traffic_project')
-    if not predictor.load_models():
+    if not predictor.load_models(mmap_mode='r'):
         print("Training models...")
         predictor.load_data('traffic_data.csv')
         predictor.train_all_models()
@@ -33,34 +61,102 @@ except Exception as e:
 @app.route('/api/predict', methods=['POST'])
 def predict_traffic():
     try:
+        model = current_predictor()
         data = request.json
         
-        predicted_traffic = predictor.predict_traffic(
-            data.get('hour', 8), data.get('day_of_week', 1), data.get('is_weekend', 0),
-            data.get('rain_intensity', 0.0), data.get('temperature', 25), data.get('humidity', 60),
-            data.get('event_flag', 0), data.get('rush_hour', 0), data.get('avg_speed', 35)
+        features = np.array([scenario_features(data)], dtype=float)
+        predictions, stds, intervals = model.predict_traffic_batch(
+            features, return_std=True, quantiles=PREDICTION_INTERVAL
         )
+        predicted_traffic, traffic_std, interval = predictions[0], stds[0], intervals[0]
         
-        route_score = predictor.calculate_route_score(
+        route_score = model.calculate_route_score(
             predicted_traffic, data.get('avg_speed', 35), 
             data.get('rain_intensity', 0.0), 0.3 if data.get('event_flag', 0) else 0.0
         )
         
         traffic_level = get_traffic_level(predicted_traffic)
         recommendations = get_recommendations(route_score, data.get('rain_intensity', 0), 
-                                           data.get('rush_hour', 0), data.get('event_flag', 0))
+                                           data.get('rush_hour', 0), data.get('event_flag', 0), traffic_std)
+        
+        horizons = []
+        if model.has_horizon_model():
+            forecasts = model.predict_horizons_batch(features)[0]
+            horizons = [
+                {'minutes': minutes, 'predicted_traffic': round(float(traffic), 0),
+                 'traffic_level': get_traffic_level(traffic)}
+                for minutes, traffic in zip(FORECAST_HORIZONS, forecasts)
+            ]
         
         return jsonify({
             'success': True,
-            'predicted_traffic': round(predicted_traffic, 0),
+            'predicted_traffic': round(float(predicted_traffic), 0),
+            'traffic_std': round(float(traffic_std), 1),
+            'traffic_interval': {
+                'quantiles': list(PREDICTION_INTERVAL),
+                'lower': round(float(interval[0]), 0),
+                'upper': round(float(interval[-1]), 0)
+            },
             'route_score': round(route_score, 1),
             'traffic_level': traffic_level,
-            'recommendations': recommendations
+            'recommendations': recommendations,
+            'horizons': horizons
         })
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_traffic_batch():
+    try:
+        model = current_predictor()
+        data = request.json
+        scenarios = data.get('scenarios', []) if isinstance(data, dict) else data
+        if not isinstance(scenarios, list):
+            return jsonify({'success': False, 'error': 'Expected a JSON array of scenarios'}), 400
+        
+        features = np.array([scenario_features(scenario) for scenario in scenarios], dtype=float)
+        predictions = model.predict_traffic_batch(features.reshape(len(scenarios), len(FEATURE_COLUMNS)))
+        
+        results = []
+        for scenario, predicted_traffic in zip(scenarios, predictions):
+            route_score = model.calculate_route_score(
+                predicted_traffic, scenario.get('avg_speed', 35),
+                scenario.get('rain_intensity', 0.0), 0.3 if scenario.get('event_flag', 0) else 0.0
+            )
+            results.append({
+                'predicted_traffic': round(float(predicted_traffic), 0),
+                'route_score': round(route_score, 1),
+                'traffic_level': get_traffic_level(predicted_traffic)
+            })
+        
+        return jsonify({'success': True, 'count': len(results), 'predictions': results})
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/observations', methods=['POST'])
+def add_observations():
+    try:
+        model = current_predictor()
+        data = request.json
+        observations = data.get('observations', []) if isinstance(data, dict) else data
+        if not isinstance(observations, list) or not observations:
+            return jsonify({'success': False, 'error': 'Expected a non-empty JSON array of observations'}), 400
+        required = FEATURE_COLUMNS + [TARGET_COLUMN]
+        incomplete = [i for i, row in enumerate(observations) if any(column not in row for column in required)]
+        if incomplete:
+            return jsonify({'success': False, 'error': f'Observations missing columns: {incomplete[:10]}'}), 400
+        
+        features = np.array([[row[column] for column in FEATURE_COLUMNS] for row in observations], dtype=float)
+        targets = np.array([row[TARGET_COLUMN] for row in observations], dtype=float)
+        update = model.partial_fit(features, targets)
+        
+        return jsonify({'success': True, 'update': update})
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/weather', methods=['GET'])
 def get_weather():
     try:
@@ -73,8 +169,8 @@ def get_weather():
 @app.route('/api/models', methods=['GET'])
 def get_model_performance():
     try:
-        predictor.load_data('traffic_data.csv')
-        results = predictor.train_all_models()
+        model, stale, refreshing = refresh_model_metrics()
+        results = model.results
         
         model_data = []
         for name, metrics in results.items():
@@ -86,40 +182,117 @@ def get_model_performance():
                 'accuracy': round(metrics['R2'] * 100, 1)
             })
         
-        feature_importance = predictor.get_feature_importance()
+        feature_importance = model.get_feature_importance()
         features = feature_importance.to_dict('records') if feature_importance is not None else []
+        permutation_importance = model.get_permutation_importance()
+        permutation_features = (permutation_importance.to_dict('records')
+                                if permutation_importance is not None else [])
         
         return jsonify({
             'success': True,
+            'version': model.version,
+            'stale': stale,
+            'refreshing': refreshing,
             'models': model_data,
-            'feature_importance': features
+            'feature_importance': features,
+            'permutation_importance': permutation_features
         })
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/models/versions', methods=['GET'])
+def get_model_versions():
+    try:
+        model = current_predictor()
+        registry = model.registry
+        versions = []
+        for version in registry.versions():
+            manifest = registry.manifest(version)
+            versions.append({
+                'version': version,
+                'created_at': manifest.get('created_at'),
+                'dataset': manifest.get('dataset'),
+                'metrics': manifest.get('metrics', {})
+            })
+        return jsonify({
+            'success': True,
+            'current': registry.current_version(),
+            'serving': model.version,
+            'versions': versions
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/models/activate', methods=['POST'])
+def activate_model_version():
+    try:
+        version = (request.json or {}).get('version')
+        if not version:
+            return jsonify({'success': False, 'error': 'Expected {"version": "vNNNN"}'}), 400
+        with swap_lock:
+            current_predictor().registry.activate(version)
+            model = swap_to_version(version)
+        return jsonify({'success': True, 'serving': model.version})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/models/rollback', methods=['POST'])
+def rollback_model_version():
+    try:
+        with swap_lock:
+            version = current_predictor().registry.rollback()
+            model = swap_to_version(version)
+        return jsonify({'success': True, 'serving': model.version})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    model = current_predictor()
+    segments = model.segment_store.stats() if model.segment_store is not None else None
+    if model.prediction_cache is None:
+        return jsonify({'success': True, 'enabled': False, 'segments': segments})
+    return jsonify({'success': True, 'enabled': True, 'stats': model.prediction_cache.stats(),
+                    'spread': model.spread_cache.stats(), 'segments': segments})
+
 @app.route('/api/routes', methods=['POST'])
 def get_routes():
     try:
+        model = current_predictor()
         data = request.json
         origin = data.get('origin', 'Bangalore')
         destination = data.get('destination', 'Mysore')
         
         routes = maps_service.get_routes(origin, destination)
         
+        adjusted_speeds = [route.get('base_speed', 40) * (1 - data.get('rain_intensity', 0) * 0.3)
+                           for route in routes]
+        features = np.array([scenario_features(data, avg_speed=speed) for speed in adjusted_speeds])
+        base_predictions, base_stds, base_intervals, from_segment = model.predict_segments_batch(
+            features, [route.get('segment_id') for route in routes],
+            return_std=True, quantiles=PREDICTION_INTERVAL
+        )
+        
         route_results = []
-        for route in routes:
-            adjusted_speed = route.get('base_speed', 40) * (1 - data.get('rain_intensity', 0) * 0.3)
+        for route, adjusted_speed, base_traffic, base_std, base_interval, segment_model in zip(
+                routes, adjusted_speeds, base_predictions, base_stds, base_intervals, from_segment):
+            # A segment model already learned its road; the global one needs the route's traffic factor
+            factor = 1.0 if segment_model else route.get('traffic_factor', 1.0)
+            predicted_traffic = base_traffic * factor
+            traffic_std = base_std * factor
             
-            predicted_traffic = predictor.predict_traffic(
-                data.get('hour', 8), data.get('day_of_week', 1), data.get('is_weekend', 0),
-                data.get('rain_intensity', 0), data.get('temperature', 25), data.get('humidity', 60),
-                data.get('event_flag', 0), data.get('rush_hour', 0), adjusted_speed
-            ) * route.get('traffic_factor', 1.0)
-            
-            route_score = predictor.calculate_route_score(
-                predicted_traffic, adjusted_speed, data.get('rain_intensity', 0),
-                0.3 if data.get('event_flag', 0) else 0.0
+            event_impact = 0.3 if data.get('event_flag', 0) else 0.0
+            route_score = model.calculate_route_score(
+                predicted_traffic, adjusted_speed, data.get('rain_intensity', 0), event_impact
+            )
+            risk_adjusted_score = model.calculate_route_score(
+                predicted_traffic, adjusted_speed, data.get('rain_intensity', 0), event_impact,
+                traffic_std=traffic_std, risk_aversion=ROUTE_RISK_AVERSION
             )
             
             route_results.append({
@@ -127,13 +300,18 @@ def get_routes():
                 'distance': route['distance'],
                 'duration': route['duration'],
                 'traffic': round(predicted_traffic, 0),
+                'traffic_std': round(float(traffic_std), 1),
+                'traffic_interval': [round(float(base_interval[0] * factor), 0),
+                                     round(float(base_interval[-1] * factor), 0)],
                 'speed': round(adjusted_speed, 1),
                 'score': round(route_score, 1),
+                'risk_adjusted_score': round(risk_adjusted_score, 1),
+                'model': 'segment' if segment_model else 'global',
                 'polyline': route.get('polyline', ''),
                 'steps': route.get('steps', [])
             })
         
-        best_route = max(route_results, key=lambda x: x['score'])
+        best_route = max(route_results, key=lambda x: x['risk_adjusted_score'])
         
         return jsonify({
             'success': True, 
@@ -146,6 +324,71 @@ def get_routes():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def current_predictor():
+    """Predictor for this request, first swapping in a newly activated registry version
+    
+    Each request keeps the predictor it started with, so a swap never
+    changes models under a request that is already running.
+    """
+    global last_version_check
+    now = time.monotonic()
+    if now - last_version_check >= VERSION_CHECK_INTERVAL and swap_lock.acquire(blocking=False):
+        try:
+            last_version_check = now
+            if predictor.artifacts_changed():
+                swap_to_version()
+        finally:
+            swap_lock.release()
+    return predictor
+
+def swap_to_version(version=None):
+    """Load a registry version (the active one by default) into a fresh predictor and serve it"""
+    global predictor
+    candidate = create_predictor()
+    if not candidate.load_models(mmap_mode='r', version=version):
+        raise RuntimeError(f"Could not load model version {version or 'CURRENT'}")
+    predictor = candidate
+    return candidate
+
+def refresh_model_metrics(data_path='traffic_data.csv'):
+    """Predictor with the active version's metrics, whether they are stale,
+    and whether they are being recomputed
+    
+    Reloads when another version was activated, but never trains or moves
+    the registry's CURRENT pointer. When the dataset changed, the current
+    models are re-evaluated on it in a background thread (see
+    TrafficPredictor.evaluate_on_dataset); until that finishes the old
+    metrics are served flagged as stale.
+    """
+    global metrics_thread
+    with metrics_lock:
+        model = current_predictor()
+        if model.artifacts_changed():
+            with swap_lock:
+                model = swap_to_version()
+        stale = model.metrics_are_stale(data_path)
+        refreshing = metrics_thread is not None and metrics_thread.is_alive()
+        if stale and not refreshing and os.path.exists(data_path):
+            metrics_thread = threading.Thread(target=recompute_metrics, args=(model, data_path), daemon=True)
+            metrics_thread.start()
+            refreshing = True
+        return model, stale, refreshing
+
+def recompute_metrics(model, data_path):
+    try:
+        model.evaluate_on_dataset(data_path)
+    except Exception as e:
+        print(f"Could not recompute model metrics: {e}")
+
+def scenario_features(data, avg_speed=None):
+    """Build a feature row in FEATURE_COLUMNS order from a request scenario"""
+    return (
+        data.get('hour', 8), data.get('day_of_week', 1), data.get('is_weekend', 0),
+        data.get('rain_intensity', 0.0), data.get('temperature', 25), data.get('humidity', 60),
+        data.get('event_flag', 0), data.get('rush_hour', 0),
+        data.get('avg_speed', 35) if avg_speed is None else avg_speed
+    )
+
 def get_traffic_level(traffic):
     traffic = float(traffic)
     if traffic < 200:
@@ -157,10 +400,12 @@ def get_traffic_level(traffic):
     else:
         return {"level": "Very Heavy", "color": "#F44336", "icon": "🔴"}
 
-def get_recommendations(score, rain, rush_hour, event):
+def get_recommendations(score, rain, rush_hour, event, traffic_std=0.0):
     recommendations = []
     if score < 40:
         recommendations.extend(["Consider alternative routes", "Delay travel if possible"])
+    if traffic_std > UNCERTAIN_TRAFFIC_STD:
+        recommendations.append("Traffic is hard to predict right now - allow extra time")
     if rain > 0.3:
         recommendations.append("Drive carefully due to rain")
     if rush_hour:
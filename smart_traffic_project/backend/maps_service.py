@@ -5,7 +5,6 @@ except ImportError:
     GOOGLEMAPS_AVAILABLE = False
     googlemaps = None
 
-import requests
 from datetime import datetime
 
 class MapsService:
@@ -68,7 +67,8 @@ class MapsService:
                     f"Turn left to reach {destination}"
                 ],
                 'traffic_factor': 1.2,
-                'base_speed': 45
+                'base_speed': 45,
+                'segment_id': 0
             },
             {
                 'name': f"Route 2 (Highway) - {origin} to {destination}",
@@ -84,7 +84,8 @@ class MapsService:
                     f"Exit and turn right to {destination}"
                 ],
                 'traffic_factor': 0.8,
-                'base_speed': 60
+                'base_speed': 60,
+                'segment_id': 1
             },
             {
                 'name': f"Route 3 (Local Roads) - {origin} to {destination}",
@@ -100,7 +101,8 @@ class MapsService:
                     f"Turn right to reach {destination}"
                 ],
                 'traffic_factor': 1.5,
-                'base_speed': 30
+                'base_speed': 30,
+                'segment_id': 2
             }
         ]
         return routes
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Training-data load benchmark: CSV parse vs columnar cache
+
+For each size, generates a dataset with data_generator, then times
+    csv     pandas.read_csv with the DATA_SCHEMA columns and dtypes
+    build   first data_cache.load_columns call (one CSV parse + column write)
+    cached  later load_columns calls (memory-mapped, no parsing)
+and checks that the cached frame matches the parsed one. Datasets are
+kept in --work-dir between runs:
+
+    python benchmarks/csv_cache.py --sizes 5000 1000000 10000000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+import pandas as pd
+
+from data_cache import cache_dir_for, load_columns
+from data_generator import generate_traffic_shards
+from ml_models import DATA_SCHEMA
+
+def dataset_path(work_dir, size):
+    """Single CSV of `size` records, generated once and reused"""
+    path = os.path.join(work_dir, f'traffic_data_{size}.csv')
+    if not os.path.exists(path):
+        shards_dir = path + '.shards'
+        shards = generate_traffic_shards(size, shards_dir)
+        with open(path + '.tmp', 'wb') as out:
+            for i, shard in enumerate(shards):
+                with open(shard, 'rb') as f:
+                    if i:
+                        f.readline()
+                    out.write(f.read())
+                os.remove(shard)
+        os.rmdir(shards_dir)
+        os.replace(path + '.tmp', path)
+    return path
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+def run_size(path, repeat):
+    cache_dir = cache_dir_for(path)
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+    csv_s, parsed = best_of(lambda: pd.read_csv(path, usecols=list(DATA_SCHEMA), dtype=DATA_SCHEMA), repeat)
+    build_s, _ = best_of(lambda: load_columns(path, DATA_SCHEMA), 1)
+    cached_s, cached = best_of(lambda: load_columns(path, DATA_SCHEMA), repeat)
+    pd.testing.assert_frame_equal(cached, parsed)
+    return {
+        'rows': len(parsed),
+        'csv_s': round(csv_s, 4),
+        'build_s': round(build_s, 4),
+        'cached_s': round(cached_s, 5),
+        'speedup': round(csv_s / cached_s, 1)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5000, 1_000_000, 10_000_000])
+    parser.add_argument('--work-dir', default=os.path.join(PROJECT_DIR, 'benchmarks', 'data'))
+    parser.add_argument('--repeat', type=int, default=3, help="take the fastest of N runs")
+    parser.add_argument('--output', help="write results as JSON")
+    args = parser.parse_args()
+
+    os.makedirs(args.work_dir, exist_ok=True)
+    results = {}
+    print(f"{'rows':>10} {'csv s':>9} {'build s':>9} {'cached s':>10} {'speedup':>9}")
+    for size in args.sizes:
+        result = run_size(dataset_path(args.work_dir, size), args.repeat)
+        results[str(size)] = result
+        print(f"{result['rows']:10d} {result['csv_s']:9.3f} {result['build_s']:9.3f} "
+              f"{result['cached_s']:10.4f} {result['speedup']:8.0f}x")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for the serving path
+
+Imports each serving module in a fresh interpreter under `python -X importtime`,
+records the module's cumulative import time and the heaviest packages it
+pulls in, and checks that no analysis-only dependency (pandas, scikit-learn,
+plotting libraries) is imported. Compare against a stored baseline to catch
+regressions:
+
+    python benchmarks/import_time.py --baseline benchmarks/baselines/import_time.json
+    python benchmarks/import_time.py --save-baseline benchmarks/baselines/import_time.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(PROJECT_DIR, 'backend')
+
+# Serving import path: backend/api.py -> ml_models -> weather_api -> maps_service
+TARGETS = ['maps_service', 'weather_api', 'ml_models', 'api']
+
+# Imported right before the target; everything logged earlier is interpreter startup
+MARKER_MODULE = 'colorsys'
+
+# Packages that must only be imported on demand, never by serving startup
+FORBIDDEN = ['pandas', 'sklearn', 'scipy', 'matplotlib', 'seaborn', 'requests']
+
+def measure(module):
+    """Cumulative import time (ms) of module in a fresh interpreter, plus per-package totals"""
+    code = f"import sys; sys.path[:0] = [{PROJECT_DIR!r}, {BACKEND_DIR!r}]; import {MARKER_MODULE}; import {module}"
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=PROJECT_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    packages = {}
+    total_us = None
+    lines = result.stderr.splitlines()
+    marker = next(i for i, line in enumerate(lines) if line.endswith(f'| {MARKER_MODULE}'))
+    for line in lines[marker + 1:]:
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        if name == module:
+            total_us = int(cumulative)
+            continue
+        # A package's outermost import line has the largest cumulative time
+        top_level = name.split('.')[0]
+        packages[top_level] = max(packages.get(top_level, 0), int(cumulative))
+    return total_us / 1000, {name: us / 1000 for name, us in packages.items()}
+
+def run(targets, repeat):
+    results = {}
+    for module in targets:
+        runs = [measure(module) for _ in range(repeat)]
+        total_ms, packages = min(runs, key=lambda run: run[0])
+        heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:5]
+        results[module] = {
+            'total_ms': round(total_ms, 1),
+            'heaviest': {name: round(ms, 1) for name, ms in heaviest},
+            'forbidden': sorted(name for name in packages if name in FORBIDDEN)
+        }
+    return results
+
+def compare(results, baseline, threshold):
+    """Regression messages for modules slower than threshold x baseline or pulling in forbidden packages"""
+    failures = []
+    for module, result in results.items():
+        if result['forbidden']:
+            failures.append(f"{module} imports {', '.join(result['forbidden'])} at startup")
+        if module in baseline and result['total_ms'] > baseline[module]['total_ms'] * threshold:
+            failures.append(f"{module}: {result['total_ms']:.1f} ms vs baseline "
+                            f"{baseline[module]['total_ms']:.1f} ms (threshold x{threshold})")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--targets', nargs='+', default=TARGETS)
+    parser.add_argument('--repeat', type=int, default=3, help="take the fastest of N runs")
+    parser.add_argument('--output', help="write results as JSON")
+    parser.add_argument('--baseline', help="fail if slower than this baseline JSON")
+    parser.add_argument('--save-baseline', help="write results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=1.5)
+    args = parser.parse_args()
+
+    results = run(args.targets, args.repeat)
+    for module, result in results.items():
+        heaviest = ', '.join(f"{name} {ms:.0f}" for name, ms in result['heaviest'].items())
+        print(f"{module:14} {result['total_ms']:8.1f} ms   heaviest: {heaviest}")
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=2)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    failures = compare(results, baseline, args.threshold)
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+KNN backend benchmark: exact tree search vs the approximate cell index
+
+For each dataset size, generates records with data_generator, scales the
+features as train_all_models does, and for every backend reports
+    fit_s          index build time
+    batch_ms       predicting --queries held-out rows at once
+    single_ms      predicting one row
+    size_mb        pickled model size
+    mae            error against the true traffic flow
+    diff_vs_exact  mean |prediction - exact KNN prediction|
+Exact results come from the kd_tree backend. The approximate backend is
+run once per --probes value.
+
+    python benchmarks/knn_backends.py --sizes 100000 1000000 3000000 --probes 4 8 16
+"""
+
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+import warnings
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+import numpy as np
+
+from data_generator import generate_traffic_dataset
+from ml_models import FEATURE_COLUMNS, TARGET_COLUMN, build_model
+
+EXACT_BACKENDS = ['kd_tree', 'ball_tree']
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+def run_backend(params, X_train, y_train, X_query, y_query, repeat):
+    start = time.perf_counter()
+    model = build_model('KNN Regressor', params=params).fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+    batch_s, predictions = best_of(lambda: model.predict(X_query), repeat)
+    single_s, _ = best_of(lambda: model.predict(X_query[:1]), repeat * 10)
+    return {
+        'fit_s': round(fit_s, 3),
+        'batch_ms': round(batch_s * 1000, 2),
+        'single_ms': round(single_s * 1000, 3),
+        'size_mb': round(len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)) / 2**20, 1),
+        'mae': round(float(np.abs(predictions - y_query).mean()), 3)
+    }, predictions
+
+def run_size(size, n_queries, probes, repeat):
+    from sklearn.preprocessing import StandardScaler
+
+    df = generate_traffic_dataset(size + n_queries)
+    X = df[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    y = df[TARGET_COLUMN].to_numpy(dtype=np.float64)
+    rng = np.random.default_rng(42)
+    query_rows = rng.choice(len(X), n_queries, replace=False)
+    train_rows = np.setdiff1d(np.arange(len(X)), query_rows)
+    scaler = StandardScaler().fit(X[train_rows])
+    X_train, y_train = scaler.transform(X[train_rows]), y[train_rows]
+    X_query, y_query = scaler.transform(X[query_rows]), y[query_rows]
+
+    backends = {name: {'algorithm': name} for name in EXACT_BACKENDS}
+    backends.update({f'approximate/{probe}': {'algorithm': 'approximate', 'n_probe': probe} for probe in probes})
+    results = {}
+    exact = None
+    for name, params in backends.items():
+        results[name], predictions = run_backend(params, X_train, y_train, X_query, y_query, repeat)
+        if exact is None:
+            exact = predictions
+        results[name]['diff_vs_exact'] = round(float(np.abs(predictions - exact).mean()), 3)
+        result = results[name]
+        print(f"{size:9d} {name:16} {result['fit_s']:8.2f} {result['batch_ms']:10.1f} {result['single_ms']:10.3f} "
+              f"{result['size_mb']:8.1f} {result['mae']:8.2f} {result['diff_vs_exact']:9.2f}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000, 3_000_000])
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--probes', type=int, nargs='+', default=[4, 8, 16])
+    parser.add_argument('--repeat', type=int, default=3, help="take the fastest of N runs")
+    parser.add_argument('--output', help="write results as JSON")
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore', category=UserWarning)
+    results = {}
+    print(f"{'rows':>9} {'backend':16} {'fit s':>8} {'batch ms':>10} {'single ms':>10} "
+          f"{'size MB':>8} {'MAE':>8} {'vs exact':>9}")
+    for size in args.sizes:
+        results[str(size)] = run_size(size, args.queries, args.probes, args.repeat)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
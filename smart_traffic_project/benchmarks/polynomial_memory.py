@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Polynomial Regression memory benchmark: dense expansion vs chunked normal equations
+
+For each row count and feature count, fits degree-2 polynomial regression on
+random standardized data two ways and reports fit time and peak traced
+memory (tracemalloc, so excluding the input matrix itself):
+    dense    PolynomialFeatures.fit_transform + LinearRegression (the old path)
+    chunked  polynomial_regression.PolynomialRegression
+The dense path is skipped when its expansion alone would exceed --dense-max-mb.
+
+    python benchmarks/polynomial_memory.py --rows 100000 1000000 --features 9 20 40
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+import numpy as np
+
+from polynomial_regression import PolynomialRegression
+
+def fit_dense(X, y):
+    from sklearn.linear_model import LinearRegression
+    from sklearn.preprocessing import PolynomialFeatures
+
+    return LinearRegression().fit(PolynomialFeatures(degree=2, include_bias=False).fit_transform(X), y)
+
+def fit_chunked(X, y):
+    return PolynomialRegression().fit(X, y)
+
+def measure(fit, X, y):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fit(X, y)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'fit_s': round(seconds, 3), 'peak_mb': round(peak / 2**20, 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--features', type=int, nargs='+', default=[9, 20, 40])
+    parser.add_argument('--dense-max-mb', type=float, default=4096)
+    parser.add_argument('--output', help="write results as JSON")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    # Import scikit-learn before anything is timed
+    fit_dense(rng.standard_normal((10, 2)), rng.standard_normal(10))
+    results = {}
+    print(f"{'rows':>9} {'features':>8} {'dense s':>8} {'dense MB':>9} {'chunked s':>10} {'chunked MB':>11}")
+    for rows in args.rows:
+        for features in args.features:
+            X = rng.standard_normal((rows, features))
+            y = X @ rng.standard_normal(features) + rng.standard_normal(rows)
+            result = {'chunked': measure(fit_chunked, X, y)}
+            dense_mb = rows * PolynomialRegression.n_terms(features) * 8 / 2**20
+            if dense_mb <= args.dense_max_mb:
+                result['dense'] = measure(fit_dense, X, y)
+            results[f'{rows}x{features}'] = result
+            dense = result.get('dense', {'fit_s': float('nan'), 'peak_mb': float('nan')})
+            print(f"{rows:9d} {features:8d} {dense['fit_s']:8.2f} {dense['peak_mb']:9.0f} "
+                  f"{result['chunked']['fit_s']:10.2f} {result['chunked']['peak_mb']:11.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
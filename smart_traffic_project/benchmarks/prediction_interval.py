@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Prediction interval benchmark
+
+Loads the saved Random Forest and, for each batch size, times
+    point      sklearn RandomForestRegressor.predict
+    engine     ForestEngine.predict (mean only)
+    std        ForestEngine.predict_spread, mean + standard deviation
+    quantiles  ForestEngine.predict_spread with a 10%-90% interval
+    per_tree   Python loop over estimators_ stacking every tree's prediction
+and checks that the spread matches the per-tree reference.
+
+Run from the directory holding the saved models, or pass --model-dir:
+    python benchmarks/prediction_interval.py --batch-sizes 1 10 100 1000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+import numpy as np
+
+from ml_models import TrafficPredictor
+
+QUANTILES = (0.1, 0.9)
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+def per_tree_spread(forest, X):
+    per_tree = np.stack([tree.predict(X) for tree in forest.estimators_], axis=1)
+    return per_tree.std(axis=1), np.quantile(per_tree, QUANTILES, axis=1).T
+
+def run_batch(forest, engine, X, repeat):
+    timings = {
+        'point': best_of(lambda: forest.predict(X), repeat)[0],
+        'engine': best_of(lambda: engine.predict(X), repeat)[0],
+        'std': best_of(lambda: engine.predict_spread(X), repeat)[0]
+    }
+    timings['quantiles'], (_, std, interval) = best_of(lambda: engine.predict_spread(X, QUANTILES), repeat)
+    timings['per_tree'], (expected_std, expected_interval) = best_of(lambda: per_tree_spread(forest, X), repeat)
+    np.testing.assert_allclose(std, expected_std, rtol=1e-4, atol=1e-3)
+    np.testing.assert_allclose(interval, expected_interval, rtol=1e-4, atol=1e-3)
+    return {name: round(seconds * 1000, 3) for name, seconds in timings.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--model-dir', default=os.getcwd())
+    parser.add_argument('--repeat', type=int, default=5, help="take the fastest of N runs")
+    parser.add_argument('--output', help="write results as JSON")
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore', category=UserWarning)
+    os.chdir(args.model_dir)
+    predictor = TrafficPredictor()
+    if not predictor.load_models():
+        raise SystemExit("No saved models found; run ml_models.py first")
+    forest = predictor.models['Random Forest']
+    engine = predictor.get_forest_engine()
+
+    rng = np.random.default_rng(42)
+    results = {}
+    print(f"{'batch':>6} {'point ms':>9} {'engine ms':>10} {'std ms':>8} {'quant ms':>9} {'per-tree ms':>12}")
+    for size in args.batch_sizes:
+        # Random rows are fine for timing: every row still walks each tree to a leaf
+        X = rng.uniform(0, 60, size=(size, forest.n_features_in_)).astype(np.float32)
+        result = run_batch(forest, engine, X, args.repeat)
+        results[str(size)] = result
+        print(f"{size:6d} {result['point']:9.3f} {result['engine']:10.3f} {result['std']:8.3f} "
+              f"{result['quantiles']:9.3f} {result['per_tree']:12.3f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Worker startup benchmark
+
+Starts N worker processes at once. Each one imports ml_models, loads the
+saved models and makes one prediction. Every worker reports how long that
+took and its memory use: RSS, PSS (shared pages split between the processes
+that map them) and private bytes. All workers stay alive until everyone has
+reported, so the shared-page accounting reflects N concurrent workers.
+
+Run from the directory holding the saved models, or pass --model-dir:
+    python benchmarks/startup.py --workers 4
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import warnings
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# mode -> (TrafficPredictor backend, load_models mmap_mode)
+MODES = {
+    'pickle': ('sklearn', None),
+    'mmap': ('compiled', 'r')
+}
+
+def memory_usage():
+    """RSS, PSS and private memory of this process in MB (Linux only)"""
+    usage = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:', 'Private_Clean:', 'Private_Dirty:'):
+                usage[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {
+        'rss_mb': round(usage['Rss'], 1),
+        'pss_mb': round(usage['Pss'], 1),
+        'private_mb': round(usage['Private_Clean'] + usage['Private_Dirty'], 1)
+    }
+
+def run_worker(mode):
+    warnings.filterwarnings('ignore', category=UserWarning)
+    start = time.perf_counter()
+    sys.path.insert(0, PROJECT_DIR)
+    from ml_models import TrafficPredictor
+    imported = time.perf_counter()
+
+    backend, mmap_mode = MODES[mode]
+    predictor = TrafficPredictor(backend=backend)
+    if not predictor.load_models(mmap_mode=mmap_mode):
+        raise SystemExit("No saved models found; run ml_models.py first")
+    loaded = time.perf_counter()
+
+    predictor.predict_traffic(8, 1, 0, 0.0, 25, 60, 0, 1, 35)
+    predicted = time.perf_counter()
+
+    report = {
+        'import_s': round(imported - start, 4),
+        'load_s': round(loaded - imported, 4),
+        'first_predict_s': round(predicted - loaded, 4)
+    }
+    report.update(memory_usage())
+    print(json.dumps(report), flush=True)
+    # Stay alive until the parent has heard from every worker
+    sys.stdin.read()
+
+def run_mode(mode, workers, model_dir):
+    processes = [
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--worker', mode],
+            cwd=model_dir, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+        )
+        for _ in range(workers)
+    ]
+    reports = []
+    for process in processes:
+        line = ''
+        while not line.startswith('{'):
+            line = process.stdout.readline()
+            if not line:
+                raise RuntimeError(f"Worker for mode {mode} exited without reporting")
+        reports.append(json.loads(line))
+    for process in processes:
+        process.stdin.close()
+        process.wait()
+    return reports
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--model-dir', default=os.getcwd())
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=list(MODES))
+    parser.add_argument('--worker', choices=list(MODES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker)
+        return
+
+    print(f"{'mode':8} {'import s':>9} {'load s':>8} {'1st pred s':>10} {'RSS MB':>8} {'PSS MB':>8} {'private MB':>10}")
+    for mode in args.modes:
+        reports = run_mode(mode, args.workers, args.model_dir)
+        average = {key: sum(r[key] for r in reports) / len(reports) for key in reports[0]}
+        print(f"{mode:8} {average['import_s']:9.3f} {average['load_s']:8.3f} {average['first_predict_s']:10.4f} "
+              f"{average['rss_mb']:8.1f} {average['pss_mb']:8.1f} {average['private_mb']:10.1f}")
+
+if __name__ == "__main__":
+    main()
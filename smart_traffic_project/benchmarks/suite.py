@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Training and inference benchmark suite
+
+For each dataset size, times
+    generate   data_generator.generate_traffic_dataset
+    load       TrafficPredictor.load_data from CSV, and from the columnar cache
+    train      fit and test-set predict of every model train_all_models compares,
+               then the whole parallel train_all_models run
+    predict    single-row predict_traffic and 1000-row predict_traffic_batch,
+               for the sklearn and compiled backends
+    score      calculate_route_score
+    api        Flask endpoints through the test client, in a separate process
+               serving the models trained at that size (prediction cache off)
+Everything runs offline; datasets and models are kept in --work-dir.
+Compare against a stored baseline to catch regressions in these hot paths:
+
+    python benchmarks/suite.py --sizes 5000 100000 1000000 --output results.json
+    python benchmarks/suite.py --sizes 5000 --baseline benchmarks/baselines/suite.json
+    python benchmarks/suite.py --sizes 5000 --save-baseline benchmarks/baselines/suite.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+import warnings
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(PROJECT_DIR, 'backend')
+sys.path.insert(0, PROJECT_DIR)
+
+import numpy as np
+
+from csv_cache import dataset_path
+from data_generator import generate_traffic_dataset
+from cross_validation import MODEL_INPUTS
+from ml_models import MODEL_NAMES, TrafficPredictor, fit_model
+
+PREDICT_BATCH_ROWS = 1000
+# generate_traffic_dataset builds the frame in memory; larger sizes are still
+# generated once for the CSV, in shards
+GENERATE_MAX_ROWS = 1_000_000
+
+SCENARIO = {
+    'hour': 8, 'day_of_week': 1, 'is_weekend': 0, 'rain_intensity': 0.5,
+    'temperature': 22, 'humidity': 80, 'event_flag': 1, 'rush_hour': 1, 'avg_speed': 25
+}
+
+# Endpoint -> (method, JSON body)
+ENDPOINTS = {
+    'POST /api/predict': ('post', SCENARIO),
+    'POST /api/predict/batch': ('post', {'scenarios': [dict(SCENARIO, hour=hour) for hour in range(24)]}),
+    'POST /api/routes': ('post', SCENARIO),
+    'GET /api/models': ('get', None),
+    'GET /api/weather': ('get', None)
+}
+
+def best_of(fn, repeat, number=1):
+    """Fastest of repeat runs, in seconds per call; each run makes number calls"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            result = fn()
+        times.append((time.perf_counter() - start) / number)
+    return round(min(times), 7), result
+
+def bench_load(path, repeat):
+    from data_cache import cache_dir_for
+
+    shutil.rmtree(cache_dir_for(path), ignore_errors=True)
+    predictor = TrafficPredictor()
+    csv_s, _ = best_of(lambda: predictor.load_data(path, use_cache=False), repeat)
+    build_s, _ = best_of(lambda: predictor.load_data(path), 1)
+    cached_s, _ = best_of(lambda: predictor.load_data(path), repeat)
+    return {'csv_s': csv_s, 'cache_build_s': build_s, 'cached_s': cached_s}
+
+def bench_train(predictor, models, repeat):
+    """Fit and test-set predict time of each model, on the inputs train_all_models uses"""
+    X_train, X_test, y_train, _, X_train_scaled, X_test_scaled = predictor.prepare_features()
+    matrices = {'raw': (X_train, X_test), 'scaled': (X_train_scaled, X_test_scaled)}
+    model_inputs = {name: matrices[MODEL_INPUTS[name]] for name in models}
+    results = {}
+    for name in models:
+        # A tiny fit first, so lazy imports inside scikit-learn are not timed
+        fit_model(name, model_inputs[name][0][:100], y_train[:100])
+        fit_s, model = best_of(lambda: fit_model(name, model_inputs[name][0], y_train), 1)
+        predict_s, _ = best_of(lambda: model.predict(model_inputs[name][1]), repeat)
+        results[name] = {'fit_s': fit_s, 'predict_test_s': predict_s}
+        print(f"  {name:22} fit {fit_s:8.3f}s  predict {predict_s:8.3f}s")
+    return results
+
+def bench_predict(repeat, number):
+    rng = np.random.default_rng(42)
+    batch = np.column_stack([
+        rng.integers(0, 24, PREDICT_BATCH_ROWS), rng.integers(0, 7, PREDICT_BATCH_ROWS),
+        rng.integers(0, 2, PREDICT_BATCH_ROWS), rng.uniform(0, 1, PREDICT_BATCH_ROWS),
+        rng.uniform(15, 35, PREDICT_BATCH_ROWS), rng.uniform(30, 90, PREDICT_BATCH_ROWS),
+        rng.integers(0, 2, PREDICT_BATCH_ROWS), rng.integers(0, 2, PREDICT_BATCH_ROWS),
+        rng.uniform(10, 60, PREDICT_BATCH_ROWS)
+    ]).astype(float)
+    results = {}
+    for backend in ('sklearn', 'compiled'):
+        predictor = TrafficPredictor(backend=backend)
+        if not predictor.load_models():
+            raise RuntimeError("No saved models to benchmark")
+        # First call loads the model and builds the engine; not part of the steady state
+        predictor.predict_traffic(**SCENARIO)
+        results[backend] = {
+            'single_s': best_of(lambda: predictor.predict_traffic(**SCENARIO), repeat, number)[0],
+            'batch_s': best_of(lambda: predictor.predict_traffic_batch(batch), repeat)[0]
+        }
+    return results
+
+def bench_score(repeat, number):
+    predictor = TrafficPredictor()
+    score_s, _ = best_of(lambda: predictor.calculate_route_score(650.0, 25.0, 0.5, 0.3), repeat, number)
+    return {'route_score_s': score_s}
+
+def run_api_worker(repeat, number):
+    """Runs in the size's directory: time each endpoint through Flask's test client"""
+    sys.path.insert(0, BACKEND_DIR)
+    import api
+
+    client = api.app.test_client()
+    results = {}
+    for endpoint, (method, body) in ENDPOINTS.items():
+        path = endpoint.split()[1]
+        call = (lambda: client.post(path, json=body)) if method == 'post' else (lambda: client.get(path))
+        response = call()
+        if response.status_code != 200:
+            raise RuntimeError(f"{endpoint} returned {response.status_code}: {response.get_data(as_text=True)}")
+        results[endpoint] = {'request_s': best_of(call, repeat, number)[0]}
+    print(json.dumps(results), flush=True)
+
+def bench_api(size_dir, repeat, number):
+    env = dict(os.environ, TRAFFIC_PROJECT_DIR=size_dir, PREDICTION_CACHE_SIZE='0')
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--api-worker', '--repeat', str(repeat), '--number', str(number)],
+        cwd=size_dir, env=env, capture_output=True, text=True
+    )
+    report = [line for line in result.stdout.splitlines() if line.startswith('{')]
+    if result.returncode != 0 or not report:
+        raise RuntimeError(f"API benchmark failed:\n{result.stderr[-2000:]}")
+    return json.loads(report[-1])
+
+def run_size(size, work_dir, models, repeat, number):
+    results = {}
+    if size <= GENERATE_MAX_ROWS:
+        results['generate'] = {'generate_s': best_of(lambda: generate_traffic_dataset(size), repeat)[0]}
+    source = dataset_path(work_dir, size)
+
+    # Models are saved into the size's own directory, next to its traffic_data.csv
+    size_dir = os.path.join(work_dir, f'size_{size}')
+    shutil.rmtree(size_dir, ignore_errors=True)
+    os.makedirs(size_dir)
+    path = os.path.join(size_dir, 'traffic_data.csv')
+    try:
+        os.link(source, path)
+    except OSError:
+        shutil.copyfile(source, path)
+    previous_dir = os.getcwd()
+    os.chdir(size_dir)
+    try:
+        results['load'] = bench_load(path, repeat)
+        predictor = TrafficPredictor()
+        predictor.load_data(path)
+        results['train'] = bench_train(predictor, models, repeat)
+        # Full pipeline, including the horizon and segment models, produces the served artifacts
+        results['train']['train_all_models_s'], _ = best_of(lambda: predictor.train_all_models(parallel=True), 1)
+        predictor.save_models()
+        results['predict'] = bench_predict(repeat, number)
+        results['score'] = bench_score(repeat, number * 10)
+    finally:
+        os.chdir(previous_dir)
+    results['api'] = bench_api(size_dir, repeat, number)
+    return results
+
+def flatten(results, prefix=''):
+    """{'5000': {'load': {'csv_s': 0.1}}} -> {'5000/load/csv_s': 0.1}"""
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f'{prefix}{key}/'))
+        else:
+            flat[f'{prefix}{key}'] = value
+    return flat
+
+def compare(results, baseline, threshold, noise_ms):
+    """Regression messages for timings slower than threshold x baseline
+
+    Differences under noise_ms are ignored: a 0.3 ms call taking 0.5 ms
+    is timer noise, not a regression.
+    """
+    failures = []
+    current = flatten(results)
+    for key, baseline_s in flatten(baseline).items():
+        if key not in current or (current[key] - baseline_s) * 1000 < noise_ms:
+            continue
+        if current[key] > baseline_s * threshold:
+            failures.append(f"{key}: {current[key] * 1000:.3f} ms vs baseline {baseline_s * 1000:.3f} ms "
+                            f"(threshold x{threshold})")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5000, 100_000, 1_000_000])
+    parser.add_argument('--models', nargs='+', default=MODEL_NAMES, choices=MODEL_NAMES)
+    parser.add_argument('--work-dir', default=os.path.join(PROJECT_DIR, 'benchmarks', 'data'))
+    parser.add_argument('--repeat', type=int, default=3, help="take the fastest of N runs")
+    parser.add_argument('--number', type=int, default=20, help="calls per run for the per-request timings")
+    parser.add_argument('--output', help="write results as JSON")
+    parser.add_argument('--baseline', help="fail if slower than this baseline JSON")
+    parser.add_argument('--save-baseline', help="write results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=1.5)
+    parser.add_argument('--noise-ms', type=float, default=1.0, help="ignore slowdowns smaller than this")
+    parser.add_argument('--api-worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore', category=UserWarning)
+    if args.api_worker:
+        run_api_worker(args.repeat, args.number)
+        return
+
+    work_dir = os.path.abspath(args.work_dir)
+    os.makedirs(work_dir, exist_ok=True)
+    results = {}
+    for size in args.sizes:
+        print(f"{size} rows")
+        results[str(size)] = run_size(size, work_dir, args.models, args.repeat, args.number)
+        for section, timings in results[str(size)].items():
+            if section != 'train':
+                for key, seconds in flatten(timings).items():
+                    print(f"  {section:8} {key:36} {seconds * 1000:10.3f} ms")
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=2)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    failures = compare(results, baseline, args.threshold, args.noise_ms)
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
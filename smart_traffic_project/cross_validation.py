@@ -0,0 +1,158 @@
+"""
+Cross-validation with fold matrices shared between models and processes
+
+The raw and scaled matrices of every fold are built once and
+saved as .npy files that each worker process memory-maps, so every model
+(and every hyperparameter trial) reads the same copy instead of
+rebuilding or pickling them.
+
+Two split strategies:
+    kfold    shuffled k-fold
+    rolling  rolling origin for time-ordered data: the series is cut into
+             n_folds + 1 blocks and fold k trains on blocks 0..k and tests
+             on block k + 1, so the model never sees the future
+"""
+
+import concurrent.futures
+import contextlib
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from evaluation import evaluate
+
+SPLIT_STRATEGIES = ('kfold', 'rolling')
+
+# Feature matrix each model is trained on, as in TrafficPredictor.train_all_models
+MODEL_INPUTS = {
+    'Linear Regression': 'scaled',
+    'Polynomial Regression': 'scaled',
+    'KNN Regressor': 'scaled',
+    'Decision Tree': 'raw',
+    'Random Forest': 'raw'
+}
+
+# Test rows predicted at a time while scoring a fold
+FOLD_CHUNK_ROWS = 100_000
+
+# Fold matrices of the current worker process, memory-mapped by load_folds
+_folds = None
+
+def split_indices(n_rows, n_folds, strategy='kfold', random_state=42):
+    """(train, test) row positions of each fold"""
+    if strategy == 'kfold':
+        from sklearn.model_selection import KFold
+        return list(KFold(n_splits=n_folds, shuffle=True, random_state=random_state).split(np.arange(n_rows)))
+    if strategy == 'rolling':
+        edges = np.linspace(0, n_rows, n_folds + 2).astype(np.intp)
+        return [(np.arange(edges[k + 1]), np.arange(edges[k + 1], edges[k + 2])) for k in range(n_folds)]
+    raise ValueError(f"Unknown split strategy: {strategy}. Choose from {SPLIT_STRATEGIES}")
+
+def save_folds(X, y, splits, directory, shuffle_train=False, random_state=42):
+    """Save each fold's raw and scaled train/test matrices under directory
+
+    With shuffle_train the training rows are stored in random order, so
+    their first n rows are a random subsample.
+    """
+    from sklearn.preprocessing import StandardScaler
+
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    for fold, (train, test) in enumerate(splits):
+        if shuffle_train:
+            train = np.random.default_rng(random_state + fold).permutation(train)
+        scaler = StandardScaler().fit(X[train])
+        matrices = {'raw': (X[train], X[test]), 'scaled': (scaler.transform(X[train]), scaler.transform(X[test]))}
+        for kind, (train_matrix, test_matrix) in matrices.items():
+            np.save(os.path.join(directory, f'fold{fold}_{kind}_train.npy'), train_matrix)
+            np.save(os.path.join(directory, f'fold{fold}_{kind}_test.npy'), test_matrix)
+        np.save(os.path.join(directory, f'fold{fold}_y_train.npy'), y[train])
+        np.save(os.path.join(directory, f'fold{fold}_y_test.npy'), y[test])
+
+def load_folds(directory):
+    """Pool initializer: map the saved fold matrices read-only"""
+    global _folds
+    _folds = {
+        name[:-len('.npy')]: np.load(os.path.join(directory, name), mmap_mode='r')
+        for name in os.listdir(directory) if name.endswith('.npy')
+    }
+
+def fold_data(name, fold):
+    """X_train, y_train, X_test, y_test of a fold, in the matrix name is trained on"""
+    kind = MODEL_INPUTS[name]
+    return (_folds[f'fold{fold}_{kind}_train'], _folds[f'fold{fold}_y_train'],
+            _folds[f'fold{fold}_{kind}_test'], _folds[f'fold{fold}_y_test'])
+
+def run_fold(name, fold, params=None):
+    """Fit one model on one fold; its test metrics and fit/predict seconds"""
+    from ml_models import build_model
+
+    X_train, y_train, X_test, y_test = fold_data(name, fold)
+    model = build_model(name, params=params)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fitted = time.perf_counter()
+    metrics, _ = evaluate(model, X_test, y_test, FOLD_CHUNK_ROWS)
+    predicted = time.perf_counter()
+    return {
+        **{metric: float(value) for metric, value in metrics.items()},
+        'fit_s': fitted - start,
+        'predict_s': predicted - fitted,
+        'train_rows': len(y_train),
+        'test_rows': len(y_test)
+    }
+
+@contextlib.contextmanager
+def fold_pool(X, y, splits, n_jobs=-1, shuffle_train=False, random_state=42):
+    """Process pool whose workers have the saved folds of X, y mapped; the
+    fold files are deleted when the block exits"""
+    workers = (os.cpu_count() or 1) if n_jobs == -1 else n_jobs
+    directory = tempfile.mkdtemp(prefix='traffic_folds_')
+    try:
+        save_folds(X, y, splits, directory, shuffle_train=shuffle_train, random_state=random_state)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=load_folds,
+                                                    initargs=(directory,)) as pool:
+            yield pool
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def summarize(folds):
+    """Mean and standard deviation over folds, mean fit/predict time and the
+    model's total seconds across all folds"""
+    summary = {}
+    for metric in ('MAE', 'RMSE', 'R2'):
+        values = [fold[metric] for fold in folds]
+        summary[metric] = float(np.mean(values))
+        summary[f'{metric}_std'] = float(np.std(values))
+    summary['fit_s'] = float(np.mean([fold['fit_s'] for fold in folds]))
+    summary['predict_s'] = float(np.mean([fold['predict_s'] for fold in folds]))
+    summary['total_s'] = float(sum(fold['fit_s'] + fold['predict_s'] for fold in folds))
+    # Comparable across fold sizes: milliseconds to predict 1000 rows
+    summary['predict_ms_per_1k'] = float(np.mean([1e6 * fold['predict_s'] / fold['test_rows'] for fold in folds]))
+    return summary
+
+def cross_validate(X, y, models, n_folds=5, strategy='kfold', hyperparameters=None, n_jobs=-1, random_state=42):
+    """Evaluate models on n_folds folds, every (model, fold) pair in parallel
+
+    X must be in time order for the rolling strategy. Returns a report
+    with each model's per-fold metrics and timings, their summary, and the
+    wall-clock seconds of the whole run.
+    """
+    start = time.perf_counter()
+    splits = split_indices(len(y), n_folds, strategy, random_state)
+    with fold_pool(X, y, splits, n_jobs=n_jobs, random_state=random_state) as pool:
+        futures = {
+            (name, fold): pool.submit(run_fold, name, fold, (hyperparameters or {}).get(name))
+            for name in models for fold in range(n_folds)
+        }
+        results = {key: future.result() for key, future in futures.items()}
+
+    report = {'strategy': strategy, 'n_folds': n_folds, 'models': {}}
+    for name in models:
+        folds = [results[name, fold] for fold in range(n_folds)]
+        report['models'][name] = {'folds': folds, 'summary': summarize(folds)}
+    report['wall_s'] = time.perf_counter() - start
+    return report
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+
+META_FILE = 'meta.json'
+
+def cache_dir_for(csv_path):
+    """Column cache directory next to the CSV, e.g. traffic_data.columns/"""
+    return os.path.splitext(csv_path)[0] + '.columns'
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def read_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, META_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def cache_is_valid(meta, csv_path, schema):
+    """Same columns and dtypes, and the CSV is unchanged by size and mtime, or else by content hash"""
+    if meta is None or meta['schema'] != dict(schema):
+        return False
+    stat = os.stat(csv_path)
+    if meta['size'] != stat.st_size:
+        return False
+    return meta['mtime_ns'] == stat.st_mtime_ns or meta['sha256'] == file_sha256(csv_path)
+
+def build_cache(csv_path, schema, cache_dir, chunksize=1_000_000):
+    """Parse the CSV once, in chunks, appending each column to a raw binary file
+
+    Each build writes to its own temporary directory, so processes building
+    at the same time never touch each other's files; the last one to finish
+    replaces the cache.
+    """
+    import pandas as pd
+
+    stat = os.stat(csv_path)
+    tmp_dir = f'{cache_dir}.{uuid.uuid4().hex}.tmp'
+    os.makedirs(tmp_dir)
+    try:
+        files = {column: open(os.path.join(tmp_dir, f'{column}.bin'), 'wb') for column in schema}
+        rows = 0
+        try:
+            for chunk in pd.read_csv(csv_path, usecols=list(schema), dtype=schema, chunksize=chunksize):
+                for column, f in files.items():
+                    chunk[column].to_numpy().tofile(f)
+                rows += len(chunk)
+        finally:
+            for f in files.values():
+                f.close()
+
+        meta = {
+            'rows': rows,
+            'schema': dict(schema),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': file_sha256(csv_path)
+        }
+        with open(os.path.join(tmp_dir, META_FILE), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        try:
+            os.replace(tmp_dir, cache_dir)
+        except OSError:
+            # Another build was renamed into place first; serve that one
+            published = read_meta(cache_dir)
+            if published is None:
+                raise
+            meta = published
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return meta
+
+def load_columns(csv_path, schema, cache_dir=None):
+    """Load csv_path as a DataFrame backed by memory-mapped column arrays
+
+    The cache is built on first use and rebuilt whenever the CSV or the
+    schema changes. Columns are read-only views of the mapped files, so
+    loading does no parsing and no copying.
+    """
+    import pandas as pd
+
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    meta = read_meta(cache_dir)
+    if not cache_is_valid(meta, csv_path, schema):
+        meta = build_cache(csv_path, schema, cache_dir)
+    elif meta['mtime_ns'] != os.stat(csv_path).st_mtime_ns:
+        # Touched but identical content: remember the new mtime so the hash is not recomputed
+        meta['mtime_ns'] = os.stat(csv_path).st_mtime_ns
+        try:
+            with open(os.path.join(cache_dir, META_FILE), 'w') as f:
+                json.dump(meta, f, indent=2)
+        except OSError:
+            pass
+
+    columns = {}
+    for column, dtype in meta['schema'].items():
+        path = os.path.join(cache_dir, f'{column}.bin')
+        if meta['rows']:
+            columns[column] = np.memmap(path, dtype=dtype, mode='r', shape=(meta['rows'],)).view(np.ndarray)
+        else:
+            columns[column] = np.empty(0, dtype=dtype)
+    return pd.DataFrame(columns, copy=False)
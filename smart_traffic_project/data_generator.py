@@ -1,77 +1,190 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import random
+from datetime import datetime
 
-def generate_traffic_dataset(num_records=5000):
-    """Generate realistic traffic dataset with weather and event data"""
-    
-    np.random.seed(42)
-    random.seed(42)
-    
-    data = []
-    start_date = datetime(2023, 1, 1)
+# One record every 6 minutes (the original loop stepped by timedelta(hours=i/10))
+MINUTES_PER_RECORD = 6
+START_DATE = datetime(2023, 1, 1)
+# Records are drawn in fixed blocks, each from its own child of SeedSequence(seed),
+# so the data never depends on how a range is split into chunks, shards or workers
+RNG_BLOCK_SIZE = 65536
+
+# Traffic multiplier for each hour of the day
+HOUR_MULTIPLIERS = np.array(
+    [0.5] * 7 +     # 00-06 night
+    [2.5] * 3 +     # 07-09 morning rush
+    [1.5] * 7 +     # 10-16 daytime
+    [2.8] * 3 +     # 17-19 evening rush
+    [1.2] * 3 +     # 20-22 evening
+    [0.5],          # 23 night
+    dtype=np.float32
+)
+
+COLUMN_DTYPES = {
+    'hour': np.int8,
+    'day_of_week': np.int8,
+    'is_weekend': np.int8,
+    'rain_intensity': np.float32,
+    'temperature': np.float32,
+    'humidity': np.float32,
+    'event_flag': np.int8,
+    'rush_hour': np.int8,
+    'avg_speed': np.float32,
+    'traffic_flow': np.float32
+}
+
+# Optional road segment column, only written when segments are requested
+SEGMENT_COLUMN = 'segment_id'
+SEGMENT_DTYPE = np.int16
+
+def segment_profiles(segments):
+    """Per-segment (flow scale, extra rush-hour load), spread deterministically over segments"""
+    segment = np.arange(segments)
+    scale = 0.6 + 0.9 * ((segment * 0.618034) % 1)
+    rush_boost = 0.4 * (segment % 2)
+    return scale.astype(np.float32), rush_boost.astype(np.float32)
+
+def generate_columns(rng, first_record, num_records, start_date=START_DATE, segment_id=None, segments=0):
+    """Vectorised traffic records first_record .. first_record + num_records - 1
+
+    Returns a dict of compact numpy columns (int8 flags and hours, float32
+    measurements) drawn from the given np.random.Generator. With a
+    segment_id per record, flow follows that segment's profile.
+    """
+    record = np.arange(first_record, first_record + num_records, dtype=np.int64)
+    minutes = record * MINUTES_PER_RECORD + start_date.hour * 60 + start_date.minute
+    hour = (minutes // 60 % 24).astype(np.int8)
+    day_of_week = ((minutes // (24 * 60) + start_date.weekday()) % 7).astype(np.int8)
+    is_weekend = (day_of_week >= 5).astype(np.int8)
+
+    rain_intensity = np.maximum(0, 0.2 + 0.3 * rng.standard_normal(num_records, dtype=np.float32))
+    temperature = 25 + 8 * rng.standard_normal(num_records, dtype=np.float32)
+    humidity = 30 + 60 * rng.random(num_records, dtype=np.float32)
+
+    event_flag = (rng.random(num_records, dtype=np.float32) < 0.1).astype(np.int8)
+
+    rush_hour = (((7 <= hour) & (hour <= 9)) | ((17 <= hour) & (hour <= 19))).astype(np.int8)
+
+    base_traffic = 200
+    weekend_multiplier = np.where(is_weekend == 1, np.float32(0.7), np.float32(1.0))
+    rain_multiplier = 1 + rain_intensity * np.float32(0.8)
+    event_multiplier = np.where(event_flag == 1, np.float32(1.5), np.float32(1.0))
+
+    traffic_flow = base_traffic * HOUR_MULTIPLIERS[hour] * weekend_multiplier * rain_multiplier * event_multiplier
+    if segment_id is not None:
+        scale, rush_boost = segment_profiles(segments)
+        traffic_flow = traffic_flow * scale[segment_id] * (1 + rush_boost[segment_id] * rush_hour)
+    traffic_flow += 30 * rng.standard_normal(num_records, dtype=np.float32)
+    traffic_flow = np.maximum(50, traffic_flow)
+
+    max_speed = 60
+    avg_speed = max_speed * (1 - np.minimum(traffic_flow / 800, np.float32(0.8)))
+    avg_speed += 5 * rng.standard_normal(num_records, dtype=np.float32)
+    avg_speed = np.clip(avg_speed, 10, max_speed)
+
+    columns = {
+        'hour': hour,
+        'day_of_week': day_of_week,
+        'is_weekend': is_weekend,
+        'rain_intensity': np.round(rain_intensity, 2),
+        'temperature': np.round(temperature, 1),
+        'humidity': np.round(humidity, 1),
+        'event_flag': event_flag,
+        'rush_hour': rush_hour,
+        'avg_speed': np.round(avg_speed, 1),
+        'traffic_flow': np.round(traffic_flow, 0)
+    }
+    columns = {name: column.astype(COLUMN_DTYPES[name], copy=False) for name, column in columns.items()}
+    if segment_id is not None:
+        columns[SEGMENT_COLUMN] = segment_id.astype(SEGMENT_DTYPE)
+    return columns
+
+def generate_records(first_record, num_records, seed=42, segments=0):
+    """Columns for records first_record .. first_record + num_records - 1
     
-    for i in range(num_records):
-        current_time = start_date + timedelta(hours=i/10)
-        hour = current_time.hour
-        day_of_week = current_time.weekday()
-        is_weekend = 1 if day_of_week >= 5 else 0
+    Any record gets the same values however the requested ranges are cut.
+    With segments > 0 each record is also assigned one of that many road
+    segments, without changing the draws behind the other columns.
+    """
+    dtypes = dict(COLUMN_DTYPES, **({SEGMENT_COLUMN: SEGMENT_DTYPE} if segments else {}))
+    columns = {name: np.empty(num_records, dtype=dtype) for name, dtype in dtypes.items()}
+    end_record = first_record + num_records
+    for block in range(first_record // RNG_BLOCK_SIZE, -(-end_record // RNG_BLOCK_SIZE)):
+        block_start = block * RNG_BLOCK_SIZE
+        rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(block,)))
+        segment_id = None
+        if segments:
+            segment_rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(block, 1)))
+            segment_id = segment_rng.integers(segments, size=RNG_BLOCK_SIZE)
+        block_columns = generate_columns(rng, block_start, RNG_BLOCK_SIZE, segment_id=segment_id, segments=segments)
         
-        rain_intensity = max(0, np.random.normal(0.2, 0.3))
-        temperature = np.random.normal(25, 8)
-        humidity = np.random.uniform(30, 90)
-        
-        event_flag = 1 if random.random() < 0.1 else 0
-        
-        rush_hour = 1 if (7 <= hour <= 9) or (17 <= hour <= 19) else 0
-        
-        base_traffic = 200
-        
-        if 7 <= hour <= 9:
-            hour_multiplier = 2.5
-        elif 17 <= hour <= 19:
-            hour_multiplier = 2.8
-        elif 10 <= hour <= 16:
-            hour_multiplier = 1.5
-        elif 20 <= hour <= 22:
-            hour_multiplier = 1.2
-        else:
-            hour_multiplier = 0.5
-            
-        weekend_multiplier = 0.7 if is_weekend else 1.0
-        
-        rain_multiplier = 1 + (rain_intensity * 0.8)
-        
-        event_multiplier = 1.5 if event_flag else 1.0
-        
-        traffic_flow = base_traffic * hour_multiplier * weekend_multiplier * rain_multiplier * event_multiplier
-        traffic_flow += np.random.normal(0, 30)
-        traffic_flow = max(50, traffic_flow)
-        
-        max_speed = 60
-        avg_speed = max_speed * (1 - min(traffic_flow/800, 0.8)) + np.random.normal(0, 5)
-        avg_speed = max(10, min(avg_speed, max_speed))
-        
-        data.append({
-            'hour': hour,
-            'day_of_week': day_of_week,
-            'is_weekend': is_weekend,
-            'rain_intensity': round(rain_intensity, 2),
-            'temperature': round(temperature, 1),
-            'humidity': round(humidity, 1),
-            'event_flag': event_flag,
-            'rush_hour': rush_hour,
-            'avg_speed': round(avg_speed, 1),
-            'traffic_flow': round(traffic_flow, 0)
-        })
+        lo = max(first_record, block_start)
+        hi = min(end_record, block_start + RNG_BLOCK_SIZE)
+        for name, column in columns.items():
+            column[lo - first_record:hi - first_record] = block_columns[name][lo - block_start:hi - block_start]
+    return columns
+
+def generate_traffic_dataset(num_records=5000, seed=42, segments=0):
+    """Generate realistic traffic dataset with weather and event data"""
+    return pd.DataFrame(generate_records(0, num_records, seed, segments))
+
+def shard_path(output_dir, shard):
+    return os.path.join(output_dir, f'traffic_data-{shard:05d}.csv')
+
+def write_shard(output_dir, shard, first_record, num_records, seed, chunk_size, segments=0):
+    """Generate one shard and append it to its CSV chunk by chunk"""
+    path = shard_path(output_dir, shard)
+    tmp_path = path + '.tmp'
+    for offset in range(0, num_records, chunk_size):
+        count = min(chunk_size, num_records - offset)
+        chunk = pd.DataFrame(generate_records(first_record + offset, count, seed, segments))
+        chunk.to_csv(tmp_path, mode='w' if offset == 0 else 'a', header=offset == 0, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+def generate_traffic_shards(num_records, output_dir, shard_size=16 * RNG_BLOCK_SIZE,
+                            chunk_size=4 * RNG_BLOCK_SIZE, workers=None, seed=42, segments=0):
+    """Generate a dataset as consecutive CSV shards written straight to output_dir
     
-    return pd.DataFrame(data)
+    Shards are generated in a process pool and each worker holds at most
+    chunk_size rows in memory. Concatenating the shards gives exactly
+    generate_traffic_dataset(num_records, seed), whatever the worker count,
+    shard size or chunk size. Returns the shard paths in order.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    n_shards = -(-num_records // shard_size)
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(write_shard, output_dir, shard, shard * shard_size,
+                        min(shard_size, num_records - shard * shard_size), seed, chunk_size, segments)
+            for shard in range(n_shards)
+        ]
+        return [future.result() for future in futures]
 
 if __name__ == "__main__":
-    df = generate_traffic_dataset()
-    df.to_csv('/Users/surjithsshetty/Desktop/smart_traffic_project/traffic_data.csv', index=False)
-    print(f"Generated dataset with {len(df)} records")
-    print(df.head())
-    print(f"\nDataset shape: {df.shape}")
-    print(f"Traffic flow range: {df['traffic_flow'].min():.0f} - {df['traffic_flow'].max():.0f}")
+    parser = argparse.ArgumentParser(description="Generate the synthetic traffic dataset")
+    parser.add_argument('--records', type=int, default=5000)
+    parser.add_argument('--output', default='traffic_data.csv', help="CSV file for a single in-memory dataset")
+    parser.add_argument('--shards-dir', help="stream the dataset to CSV shards in this directory instead")
+    parser.add_argument('--shard-size', type=int, default=16 * RNG_BLOCK_SIZE)
+    parser.add_argument('--chunk-size', type=int, default=4 * RNG_BLOCK_SIZE)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--segments', type=int, default=0, help="add a segment_id column with this many road segments")
+    args = parser.parse_args()
+    
+    if args.shards_dir:
+        paths = generate_traffic_shards(args.records, args.shards_dir, args.shard_size,
+                                        args.chunk_size, args.workers, args.seed, args.segments)
+        print(f"Generated {args.records} records in {len(paths)} shards under {args.shards_dir}")
+    else:
+        df = generate_traffic_dataset(args.records, args.seed, args.segments)
+        df.to_csv(args.output, index=False)
+        print(f"Generated dataset with {len(df)} records")
+        print(df.head())
+        print(f"\nDataset shape: {df.shape}")
+        print(f"Traffic flow range: {df['traffic_flow'].min():.0f} - {df['traffic_flow'].max():.0f}")
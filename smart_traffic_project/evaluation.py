@@ -0,0 +1,59 @@
+import numpy as np
+
+class RegressionMetrics:
+    """MAE, RMSE and R² accumulated chunk by chunk
+
+    Keeps running error sums plus the target's running mean and sum of
+    squared deviations (chunks are merged with Chan et al.'s pairwise
+    update), so the result equals one pass over the whole test set without
+    ever holding it or its predictions. 2-D targets give one value per
+    output column.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.abs_error = 0.0
+        self.squared_error = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, y_true, y_pred):
+        y_true = np.asarray(y_true, dtype=np.float64)
+        n = len(y_true)
+        if n == 0:
+            return self
+        error = np.asarray(y_pred, dtype=np.float64).reshape(y_true.shape) - y_true
+        self.abs_error = self.abs_error + np.abs(error).sum(axis=0)
+        self.squared_error = self.squared_error + np.square(error).sum(axis=0)
+
+        chunk_mean = y_true.mean(axis=0)
+        chunk_m2 = np.square(y_true - chunk_mean).sum(axis=0)
+        total = self.n + n
+        delta = chunk_mean - self.mean
+        self.mean = self.mean + delta * n / total
+        self.m2 = self.m2 + chunk_m2 + np.square(delta) * self.n * n / total
+        self.n = total
+        return self
+
+    def result(self):
+        return {
+            'MAE': self.abs_error / self.n,
+            'RMSE': np.sqrt(self.squared_error / self.n),
+            'R2': 1 - self.squared_error / self.m2
+        }
+
+def evaluate(model, X, y, chunk_rows, keep_predictions=False):
+    """Metrics of model on X, y, predicting chunk_rows rows at a time
+
+    Returns (metrics, predictions); predictions is None unless
+    keep_predictions, so memory stays at one chunk of predictions.
+    """
+    y = np.asarray(y)
+    metrics = RegressionMetrics()
+    kept = []
+    for start in range(0, len(y), chunk_rows):
+        predictions = model.predict(X[start:start + chunk_rows])
+        metrics.update(y[start:start + chunk_rows], predictions)
+        if keep_predictions:
+            kept.append(predictions)
+    return metrics.result(), np.concatenate(kept) if keep_predictions else None
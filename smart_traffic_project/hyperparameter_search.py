@@ -0,0 +1,134 @@
+"""
+Successive-halving hyperparameter search
+
+Every candidate configuration starts on a small budget: a fraction of each
+fold's training rows, or a few trees for forests. After each rung only the
+best 1/factor of the candidates go on, with factor times the budget, until
+one is left or the full budget is reached. Trials run in a process pool.
+
+Folds come from cross_validation.fold_pool: their raw and scaled matrices
+are built once and memory-mapped by every worker, so all trials share one
+copy instead of rebuilding or pickling them.
+"""
+
+import concurrent.futures
+import itertools
+import time
+
+import numpy as np
+
+from cross_validation import fold_data, fold_pool, split_indices
+
+# Grid searched for each model, and the budget that grows between rungs:
+# 'rows' of the fold's training set, or the forest's n_estimators
+SEARCH_SPACES = {
+    'KNN Regressor': {
+        'grid': {'n_neighbors': [3, 5, 7, 10, 15, 25], 'weights': ['uniform', 'distance']},
+        'resource': 'rows'
+    },
+    'Decision Tree': {
+        'grid': {'max_depth': [6, 8, 10, 12, 15, 20], 'min_samples_leaf': [1, 5, 10, 20]},
+        'resource': 'rows'
+    },
+    'Random Forest': {
+        'grid': {'max_depth': [10, 15, 20, None], 'min_samples_leaf': [1, 2, 5],
+                 'max_features': [1.0, 0.5, 'sqrt']},
+        'resource': 'n_estimators',
+        'max_resource': 100
+    }
+}
+
+def run_trial(name, params, fold, budget):
+    """Validation MAE of one configuration on one fold with the given budget"""
+    from sklearn.metrics import mean_absolute_error
+    from ml_models import build_model
+
+    X_train, y_train, X_val, y_val = fold_data(name, fold)
+    if SEARCH_SPACES[name]['resource'] == 'rows':
+        X_train, y_train = X_train[:budget], y_train[:budget]
+    else:
+        params = {**params, 'n_estimators': budget}
+    model = build_model(name, params=params)
+    model.fit(X_train, y_train)
+    return mean_absolute_error(y_val, model.predict(X_val))
+
+def candidates(name):
+    grid = SEARCH_SPACES[name]['grid']
+    return [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+
+def budgets(name, n_candidates, n_rows, factor):
+    """Budget of each rung, smallest first, ending at the full budget"""
+    space = SEARCH_SPACES[name]
+    max_resource = n_rows if space['resource'] == 'rows' else space['max_resource']
+    # One rung per halving until a single candidate would be left
+    n_rungs = 1
+    while n_candidates // factor > 1:
+        n_candidates //= factor
+        n_rungs += 1
+    return [max(1, int(max_resource / factor ** (n_rungs - 1 - rung))) for rung in range(n_rungs)]
+
+def successive_halving(pool, name, n_folds, n_rows, factor, deadline):
+    """Search one model's grid; returns the winner's params, its mean MAE, the rungs
+    run and whether the last of them ran at the full budget"""
+    survivors = candidates(name)
+    rungs = []
+    planned = budgets(name, len(survivors), n_rows, factor)
+    for budget in planned:
+        futures = {
+            (i, fold): pool.submit(run_trial, name, params, fold, budget)
+            for i, params in enumerate(survivors) for fold in range(n_folds)
+        }
+        scores = {}
+        for (i, fold), future in futures.items():
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                scores.setdefault(i, []).append(future.result(timeout=remaining))
+            except concurrent.futures.TimeoutError:
+                for pending in futures.values():
+                    pending.cancel()
+                break
+        # Only configurations scored on every fold are comparable
+        complete = {i: np.mean(fold_scores) for i, fold_scores in scores.items() if len(fold_scores) == n_folds}
+        if not complete:
+            break
+        ranked = sorted(complete, key=complete.get)
+        rungs.append({'budget': budget, 'candidates': len(survivors), 'completed': len(complete),
+                      'best_MAE': float(complete[ranked[0]])})
+        best = (survivors[ranked[0]], float(complete[ranked[0]]))
+        if len(complete) < len(survivors):
+            break
+        survivors = [survivors[i] for i in ranked[:max(1, len(survivors) // factor)]]
+    if not rungs:
+        return None, None, rungs, False
+    return best[0], best[1], rungs, rungs[-1]['budget'] == planned[-1]
+
+def search(X, y, models=None, n_folds=3, factor=3, time_budget=None, n_jobs=-1, random_state=42):
+    """Tune each model in models (default: every model with a search space)
+
+    Returns {model name: {'params', 'MAE', 'rungs', 'full_budget', 'elapsed_s'}}.
+    With time_budget seconds, unfinished trials are cancelled when it runs
+    out and a model's winner is the best configuration scored on every fold
+    in its last rung. full_budget is False when that rung was a cheaper one,
+    so the winner was never scored at the full budget; models not reached
+    are left out.
+    """
+    models = [name for name in (models or SEARCH_SPACES) if name in SEARCH_SPACES]
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+    splits = split_indices(len(y), n_folds, 'kfold', random_state)
+    n_rows = min(len(train) for train, _ in splits)
+    results = {}
+    # Training rows are shuffled so the first n of them are a random subsample
+    with fold_pool(X, y, splits, n_jobs=n_jobs, shuffle_train=True, random_state=random_state) as pool:
+        for name in models:
+            if deadline is not None and time.monotonic() >= deadline:
+                print(f"Time budget used up; {name} keeps its default hyperparameters")
+                continue
+            start = time.perf_counter()
+            params, mae, rungs, full_budget = successive_halving(pool, name, n_folds, n_rows, factor, deadline)
+            if params is None:
+                continue
+            results[name] = {'params': params, 'MAE': mae, 'rungs': rungs, 'full_budget': full_budget,
+                             'elapsed_s': round(time.perf_counter() - start, 2)}
+            print(f"{'Tuned' if full_budget else 'Partly tuned'} {name}: {params} (CV MAE {mae:.2f}, "
+                  f"{len(rungs)} rungs, budget {rungs[-1]['budget']}, {results[name]['elapsed_s']:.1f}s)")
+    return results
@@ -0,0 +1,136 @@
+import numpy as np
+
+class ApproximateKNNRegressor:
+    """Nearest-neighbour regressor over an inverted-file index, built with numpy
+
+    fit() clusters the training points into n_cells cells with a few
+    k-means iterations on a sample and stores the points grouped by cell,
+    in float32. A query only scans the points of its n_probe nearest
+    cells, so it reads about n_probe / n_cells of the training set
+    instead of all of it. Neighbours that sit in an unprobed cell are
+    missed, which is the accuracy traded for speed; raising n_probe
+    narrows the gap and n_probe = n_cells is exact search.
+    """
+
+    def __init__(self, n_neighbors=5, weights='uniform', n_cells=None, n_probe=8,
+                 n_iter=10, sample_size=100_000, random_state=42):
+        self.n_neighbors = n_neighbors
+        self.weights = weights
+        self.n_cells = n_cells
+        self.n_probe = n_probe
+        self.n_iter = n_iter
+        self.sample_size = sample_size
+        self.random_state = random_state
+
+    def get_params(self, deep=True):
+        return {name: getattr(self, name) for name in
+                ('n_neighbors', 'weights', 'n_cells', 'n_probe', 'n_iter', 'sample_size', 'random_state')}
+
+    def set_params(self, **params):
+        for name, value in params.items():
+            if name not in self.get_params():
+                raise ValueError(f"Invalid parameter {name} for ApproximateKNNRegressor")
+            setattr(self, name, value)
+        return self
+
+    @staticmethod
+    def _squared_distances(X, points, point_norms):
+        """Squared Euclidean distances between every row of X and every point"""
+        distances = X @ points.T
+        distances *= -2
+        distances += point_norms
+        distances += np.square(X).sum(axis=1)[:, None]
+        return np.maximum(distances, 0, out=distances)
+
+    def _nearest_centroids(self, X, n, chunk_rows=4096):
+        """Indices of the n nearest centroids of each row of X"""
+        nearest = np.empty((len(X), n), dtype=np.intp)
+        for start in range(0, len(X), chunk_rows):
+            distances = self._squared_distances(X[start:start + chunk_rows], self.centroids_, self.centroid_norms_)
+            if n == 1:
+                nearest[start:start + chunk_rows, 0] = distances.argmin(axis=1)
+                continue
+            if n < distances.shape[1]:
+                candidates = np.argpartition(distances, n - 1, axis=1)[:, :n]
+            else:
+                candidates = np.broadcast_to(np.arange(distances.shape[1]), distances.shape)
+            order = np.take_along_axis(distances, candidates, axis=1).argsort(axis=1)
+            nearest[start:start + chunk_rows] = np.take_along_axis(candidates, order, axis=1)
+        return nearest
+
+    def fit(self, X, y):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        y = np.asarray(y, dtype=np.float32)
+        rng = np.random.default_rng(self.random_state)
+        n_cells = min(len(X), self.n_cells or max(1, int(np.sqrt(len(X)))))
+
+        # Lloyd's k-means on a sample; only the final assignment touches every point
+        sample = X[rng.choice(len(X), min(len(X), self.sample_size), replace=False)]
+        self.centroids_ = sample[rng.choice(len(sample), n_cells, replace=False)].copy()
+        for _ in range(self.n_iter):
+            self.centroid_norms_ = np.square(self.centroids_).sum(axis=1)
+            assignment = self._nearest_centroids(sample, 1)[:, 0]
+            counts = np.bincount(assignment, minlength=n_cells)
+            sums = np.zeros_like(self.centroids_)
+            np.add.at(sums, assignment, sample)
+            # Empty cells keep their old centroid
+            filled = counts > 0
+            self.centroids_[filled] = sums[filled] / counts[filled, None]
+        self.centroid_norms_ = np.square(self.centroids_).sum(axis=1)
+
+        assignment = self._nearest_centroids(X, 1)[:, 0]
+        order = np.argsort(assignment, kind='stable')
+        self.points_ = X[order]
+        self.point_norms_ = np.square(self.points_).sum(axis=1)
+        self.targets_ = y[order]
+        self.offsets_ = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=n_cells))])
+        self.n_features_in_ = X.shape[1]
+        return self
+
+    def kneighbors(self, X):
+        """Squared distances and training-row positions (in index order) of
+        the n_neighbors nearest points found for each row of X"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        k = self.n_neighbors
+        best_distances = np.full((len(X), k), np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(X), k), dtype=np.intp)
+        probes = self._nearest_centroids(X, min(self.n_probe, len(self.centroids_)))
+
+        # Visit each probed cell once, for all the queries that probe it
+        cells = probes.ravel()
+        queries = np.repeat(np.arange(len(X)), probes.shape[1])
+        order = np.argsort(cells, kind='stable')
+        cells, queries = cells[order], queries[order]
+        boundaries = np.flatnonzero(np.diff(cells)) + 1
+        for cell_queries, cell in zip(np.split(queries, boundaries), cells[np.r_[0, boundaries]]):
+            first, last = self.offsets_[cell], self.offsets_[cell + 1]
+            if first == last:
+                continue
+            distances = self._squared_distances(X[cell_queries], self.points_[first:last],
+                                                self.point_norms_[first:last])
+            # Merge this cell's points into each query's running k best
+            merged_distances = np.concatenate([best_distances[cell_queries], distances], axis=1)
+            merged_rows = np.concatenate([
+                best_rows[cell_queries],
+                np.broadcast_to(np.arange(first, last), distances.shape)
+            ], axis=1)
+            keep = np.argpartition(merged_distances, k - 1, axis=1)[:, :k]
+            best_distances[cell_queries] = np.take_along_axis(merged_distances, keep, axis=1)
+            best_rows[cell_queries] = np.take_along_axis(merged_rows, keep, axis=1)
+        return best_distances, best_rows
+
+    def predict(self, X):
+        distances, rows = self.kneighbors(X)
+        targets = self.targets_[rows].astype(np.float64)
+        found = np.isfinite(distances)
+        if self.weights == 'distance':
+            distances = np.sqrt(distances.astype(np.float64))
+            with np.errstate(divide='ignore'):
+                weights = np.where(found, 1 / distances, 0)
+            # As in scikit-learn, exact matches take all the weight
+            exact = distances == 0
+            has_exact = exact.any(axis=1)
+            weights[has_exact] = exact[has_exact]
+        else:
+            weights = found.astype(np.float64)
+        return (weights * targets).sum(axis=1) / weights.sum(axis=1)
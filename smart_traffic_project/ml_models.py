@@ -1,38 +1,431 @@
-import pandas as pd
+# pandas and scikit-learn are imported inside the methods that use them, so a
+# serving process that only loads saved models does not pay for them at startup.
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import PolynomialFeatures
-from sklearn.neighbors import KNeighborsRegressor
-from sklearn.tree import DecisionTreeRegressor
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import joblib
-import matplotlib.pyplot as plt
-import seaborn as sns
+import json
+import os
+import shutil
+import sys
+import threading
+from datetime import datetime
+
+from tree_engine import ForestEngine
+from prediction_grid import PredictionGrid
+from prediction_cache import PredictionCache
+from data_cache import load_columns, file_sha256
+from online_learning import OnlineRegressor, ObservationWindow, regrow_forest
+from model_registry import ModelRegistry, REGISTRY_DIR
+from segment_models import SegmentModelStore
+from hyperparameter_search import search as search_hyperparameters
+from evaluation import evaluate
+from cross_validation import MODEL_INPUTS, cross_validate as cross_validate_models
+
+FEATURE_COLUMNS = ['hour', 'day_of_week', 'is_weekend', 'rain_intensity',
+                   'temperature', 'humidity', 'event_flag', 'rush_hour', 'avg_speed']
+
+TARGET_COLUMN = 'traffic_flow'
+
+# Columns read from the dataset and the compact dtypes they are parsed into
+DATA_SCHEMA = {
+    'hour': 'int8',
+    'day_of_week': 'int8',
+    'is_weekend': 'int8',
+    'rain_intensity': 'float32',
+    'temperature': 'float32',
+    'humidity': 'float32',
+    'event_flag': 'int8',
+    'rush_hour': 'int8',
+    'avg_speed': 'float32',
+    TARGET_COLUMN: 'float32'
+}
+
+# Optional road segment (or segment cluster) id; each segment with at least
+# SEGMENT_MIN_ROWS rows gets its own compact forest, the rest use the global one
+SEGMENT_COLUMN = 'segment_id'
+SEGMENT_DTYPE = 'int16'
+SEGMENT_MODEL_NAME = 'Segment Forest'
+SEGMENT_MIN_ROWS = 500
+SEGMENT_MEMORY_BUDGET = 64 * 2**20
+
+MODEL_NAMES = ['Linear Regression', 'Polynomial Regression', 'KNN Regressor',
+               'Decision Tree', 'Random Forest']
+
+PREDICTION_BACKENDS = ('sklearn', 'compiled', 'grid')
+# Neighbour search of the KNN Regressor: scikit-learn's exact algorithms, or
+# knn_index.ApproximateKNNRegressor, which only scans the query's nearest cells
+KNN_BACKENDS = ('auto', 'kd_tree', 'ball_tree', 'brute', 'approximate')
+# Above this many rows sklearn's threaded predict overtakes the array engine
+COMPILED_MAX_ROWS = 1024
+# The grid backend is only served if its measured max error (vehicles/hour)
+# stays within this budget; otherwise predictions come from the compiled forest
+GRID_MAX_ERROR = 100
+# Rows per pass when computing the per-tree spread, which holds an
+# (rows x trees) array of leaf values
+SPREAD_CHUNK_ROWS = 10_000
+
+# Polynomial SGD model kept current from streamed observations by partial_fit
+ONLINE_MODEL_NAME = 'Online SGD'
+# partial_fit keeps this many recent observations; every FOREST_REFRESH_ROWS new
+# rows the FOREST_REFRESH_TREES oldest forest trees are regrown on that window
+ONLINE_WINDOW_ROWS = 50000
+FOREST_REFRESH_ROWS = 5000
+FOREST_REFRESH_TREES = 10
+
+# Minutes ahead forecast by the multi-output horizon model, all in one forest pass
+FORECAST_HORIZONS = (5, 15, 30, 60)
+HORIZON_MODEL_NAME = 'Multi-Horizon Forest'
+
+# Test-set rows predicted at a time when computing metrics
+EVAL_CHUNK_ROWS = 100_000
+
+# Seconds tune_hyperparameters may spend before keeping the best configurations found
+TUNING_TIME_BUDGET = 600
+
+# Permutation importance is measured on a subsample of the test set stratified
+# by traffic flow, shuffling every feature PERMUTATION_REPEATS times
+PERMUTATION_REPEATS = 5
+PERMUTATION_SAMPLE_ROWS = 5000
+PERMUTATION_STRATA = 10
+
+# Artifact paths below are relative to a registry version directory, or to the
+# working directory for artifacts saved before the registry existed.
+# One pickle per model plus a manifest, so processes only load what they use
+MODELS_DIR = 'models'
+MANIFEST_PATH = os.path.join(MODELS_DIR, 'manifest.json')
+# Single pickle of every model written by older versions; still loadable
+LEGACY_MODELS_PATH = 'trained_models.pkl'
+SCALER_PATH = 'scaler.pkl'
+POLY_FEATURES_PATH = 'poly_features.pkl'
+METRICS_PATH = 'model_metrics.pkl'
+# Uncompressed node arrays of the Random Forest, memory-mapped by serving processes
+FOREST_ENGINE_DIR = 'forest_engine'
+HORIZON_ENGINE_DIR = 'horizon_engine'
+SEGMENT_MODELS_DIR = 'segments'
+
+def file_signature(file_path):
+    """Cheap change marker for a file: (size, mtime in ns), or None if missing"""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+def dataset_schema(file_path):
+    """DATA_SCHEMA, plus the segment column if the CSV has one"""
+    with open(file_path) as f:
+        header = f.readline().strip().split(',')
+    if SEGMENT_COLUMN in header:
+        return {**DATA_SCHEMA, SEGMENT_COLUMN: SEGMENT_DTYPE}
+    return DATA_SCHEMA
+
+def read_dataset(file_path, schema=None, use_cache=True):
+    """Every row of the CSV's schema columns (dataset_schema by default)
+    
+    With use_cache the columns come from the memory-mapped cache next to
+    the CSV (see data_cache.py); if that cannot be built, e.g. because
+    the CSV sits in a read-only directory, the CSV is read directly.
+    """
+    import pandas as pd
+    
+    schema = schema or dataset_schema(file_path)
+    if use_cache:
+        try:
+            return load_columns(file_path, schema)
+        except OSError as e:
+            print(f"Column cache unavailable ({e}); reading the CSV directly")
+    return pd.read_csv(file_path, usecols=list(schema), dtype=schema)
+
+def horizon_targets(flow, horizons, minutes_per_record):
+    """Flow the given numbers of minutes after each record of an evenly spaced series
+    
+    Horizons that fall between two records are linearly interpolated.
+    Returns an (n, len(horizons)) array for the first n records, the ones
+    whose every horizon lies inside the series.
+    """
+    flow = np.asarray(flow, dtype=np.float64)
+    steps = np.asarray(horizons, dtype=np.float64) / minutes_per_record
+    n = max(0, len(flow) - int(np.ceil(steps.max())))
+    position = np.arange(n)[:, None] + steps
+    before = np.floor(position).astype(np.intp)
+    after = np.minimum(before + 1, len(flow) - 1)
+    fraction = position - before
+    return (1 - fraction) * flow[before] + fraction * flow[after]
+
+def build_model(name, n_jobs=None, params=None):
+    """Create an unfitted estimator for one of the five compared models,
+    with params (e.g. tuned hyperparameters) overriding the defaults
+    
+    For the KNN Regressor, params['algorithm'] picks one of KNN_BACKENDS.
+    """
+    from sklearn.linear_model import LinearRegression
+    from sklearn.neighbors import KNeighborsRegressor
+    from sklearn.tree import DecisionTreeRegressor
+    from sklearn.ensemble import RandomForestRegressor
+    from polynomial_regression import PolynomialRegression
+    from knn_index import ApproximateKNNRegressor
+    
+    params = dict(params or {})
+    if name == 'Linear Regression':
+        model = LinearRegression()
+    elif name == 'Polynomial Regression':
+        model = PolynomialRegression()
+    elif name == 'KNN Regressor':
+        if params.get('algorithm') == 'approximate':
+            del params['algorithm']
+            model = ApproximateKNNRegressor(n_neighbors=5)
+        else:
+            model = KNeighborsRegressor(n_neighbors=5)
+    elif name == 'Decision Tree':
+        model = DecisionTreeRegressor(random_state=42, max_depth=10)
+    elif name == 'Random Forest' or name == HORIZON_MODEL_NAME:
+        model = RandomForestRegressor(n_estimators=100, random_state=42, max_depth=15, n_jobs=n_jobs)
+    elif name == SEGMENT_MODEL_NAME:
+        model = RandomForestRegressor(n_estimators=30, random_state=42, max_depth=12, n_jobs=n_jobs)
+    else:
+        raise ValueError(f"Unknown model: {name}")
+    return model.set_params(**params)
+
+def fit_model(name, X_train, y_train, n_jobs=None, params=None):
+    """Build and fit a model; module level so it can run in a worker process"""
+    model = build_model(name, n_jobs=n_jobs, params=params)
+    model.fit(X_train, y_train)
+    return model
+
+def stratified_sample(y, n_rows, n_strata=PERMUTATION_STRATA, random_state=42):
+    """Sorted positions of n_rows rows of y, drawn evenly from its quantile bins
+    so the subsample keeps the target's distribution"""
+    from sklearn.model_selection import train_test_split
+    
+    y = np.asarray(y)
+    if len(y) <= n_rows:
+        return np.arange(len(y))
+    edges = np.unique(np.quantile(y, np.linspace(0, 1, n_strata + 1)[1:-1]))
+    strata = np.searchsorted(edges, y, side='right')
+    sample, _ = train_test_split(np.arange(len(y)), train_size=n_rows, stratify=strata,
+                                 random_state=random_state)
+    return np.sort(sample)
+
+def permutation_repeat(predict, X, y, baseline, seed):
+    """Drop in R² when each column of X is shuffled in turn; one repeat,
+    module level so it can run in a worker process"""
+    from sklearn.metrics import r2_score
+    
+    rng = np.random.default_rng(seed)
+    X_permuted = X.copy()
+    drops = np.empty(X.shape[1])
+    for column in range(X.shape[1]):
+        X_permuted[:, column] = X[rng.permutation(len(X)), column]
+        drops[column] = baseline - r2_score(y, predict(X_permuted))
+        X_permuted[:, column] = X[:, column]
+    return drops
+
+def model_filename(name):
+    """Artifact file name for a model, e.g. 'Random Forest' -> 'random_forest.pkl'"""
+    return name.lower().replace(' ', '_') + '.pkl'
+
+class LazyModels(dict):
+    """Model dict that unpickles each model from its own artifact on first access
+    
+    Only models that have been looked up are held in memory; `name in models`
+    is also true for models that are saved but not loaded yet.
+    """
+    
+    def __init__(self, model_dir, files, mmap_mode=None):
+        super().__init__()
+        self.model_dir = model_dir
+        self.files = dict(files)
+        self.mmap_mode = mmap_mode
+        self.lock = threading.Lock()
+    
+    def __missing__(self, name):
+        if name not in self.files:
+            raise KeyError(name)
+        with self.lock:
+            if not dict.__contains__(self, name):
+                path = os.path.join(self.model_dir, self.files[name])
+                dict.__setitem__(self, name, joblib.load(path, mmap_mode=self.mmap_mode))
+            return dict.__getitem__(self, name)
+    
+    def __contains__(self, name):
+        return name in self.files or dict.__contains__(self, name)
+    
+    def pop(self, name, *default):
+        """Forget a model, saved or loaded; one that was never loaded is not unpickled to be returned"""
+        with self.lock:
+            saved = self.files.pop(name, None)
+            if saved is not None and not dict.__contains__(self, name):
+                return None
+            return dict.pop(self, name, *default)
+    
+    def loaded_names(self):
+        return list(dict.keys(self))
 
 class TrafficPredictor:
-    def __init__(self):
+    def __init__(self, backend='sklearn', grid_axes=None, cache_size=0, cache_ttl=None,
+                 cache_quantization=None, registry_dir=REGISTRY_DIR, segment_memory_budget=SEGMENT_MEMORY_BUDGET,
+                 knn_backend=None, grid_max_error=GRID_MAX_ERROR):
+        if backend not in PREDICTION_BACKENDS:
+            raise ValueError(f"Unknown prediction backend: {backend}. Choose from {PREDICTION_BACKENDS}")
+        if knn_backend is not None and knn_backend not in KNN_BACKENDS:
+            raise ValueError(f"Unknown KNN backend: {knn_backend}. Choose from {KNN_BACKENDS}")
+        self.backend = backend
+        # None: the active version's backend when training, else 'auto'
+        self.knn_backend = knn_backend
+        self.forest_engine = None
+        self.grid_axes = grid_axes
+        self.grid_max_error = grid_max_error
+        self.prediction_grid = None
+        self.prediction_cache = None
+        self.horizon_engine = None
+        self.horizon_cache = None
+        # std and quantiles of the forests' per-tree predictions, keyed by engine and quantiles too
+        self.spread_cache = None
+        # Segment engines trained in this process, or the on-disk store of a loaded version
+        self.segment_engines = {}
+        self.segment_results = {}
+        self.segment_store = None
+        self.segment_memory_budget = segment_memory_budget
+        if cache_size:
+            self.prediction_cache = PredictionCache(cache_size, cache_ttl, cache_quantization)
+            self.horizon_cache = PredictionCache(cache_size, cache_ttl, cache_quantization)
+            self.spread_cache = PredictionCache(cache_size, cache_ttl, cache_quantization)
         self.models = {}
-        self.scaler = StandardScaler()
-        self.poly_features = PolynomialFeatures(degree=2, include_bias=False)
+        self.registry = ModelRegistry(registry_dir)
+        # Directory the models were loaded from or saved to, and its registry version
+        self.artifact_dir = '.'
+        self.version = None
+        # Created on first use, or unpickled from disk once load_models has run
+        self._scaler = None
+        self._poly_features = None
+        self.saved_preprocessors = False
         self.feature_names = []
         self.results = {}
+        self.horizon_results = {}
+        self.feature_importance = None
+        self.saved_feature_importance = []
+        self.permutation_importance = None
+        self.saved_permutation_importance = []
+        # Tuned configurations by model name, used by train_all_models instead of the defaults
+        self.hyperparameters = {}
+        self.tuning_results = {}
+        # Per-fold and aggregate metrics of the last cross_validate run
+        self.cv_report = None
+        # Training data; released by train_all_models once fitting ends
+        self.df = None
+        self.X_test = None
+        self.y_test = None
+        self.dataset_rows = None
+        self.dataset_path = None
+        self.dataset_is_contiguous = False
+        self.dataset_signature = None
+        # Content hash of the dataset, taken when the models are saved
+        self.dataset_sha256 = None
+        self.artifact_signature = None
+        self.online_window = None
+        self.rows_since_refresh = 0
+        self.forest_refreshes = 0
+        self.update_lock = threading.Lock()
+        # Guards the engines and grid built from the models; bumped by reset_serving_state
+        self.serving_lock = threading.Lock()
+        self.serving_generation = 0
         
-    def load_data(self, file_path):
-        """Load and prepare the dataset"""
-        self.df = pd.read_csv(file_path)
+    @property
+    def scaler(self):
+        """Feature scaler; created or unpickled on first use"""
+        if self._scaler is None:
+            if self.saved_preprocessors:
+                self._scaler = joblib.load(os.path.join(self.artifact_dir, SCALER_PATH))
+            else:
+                from sklearn.preprocessing import StandardScaler
+                self._scaler = StandardScaler()
+        return self._scaler
+    
+    @scaler.setter
+    def scaler(self, scaler):
+        self._scaler = scaler
+    
+    @property
+    def poly_features(self):
+        """Polynomial expansion; created or unpickled on first use"""
+        if self._poly_features is None:
+            if self.saved_preprocessors:
+                self._poly_features = joblib.load(os.path.join(self.artifact_dir, POLY_FEATURES_PATH))
+            else:
+                from sklearn.preprocessing import PolynomialFeatures
+                self._poly_features = PolynomialFeatures(degree=2, include_bias=False)
+        return self._poly_features
+    
+    @poly_features.setter
+    def poly_features(self, poly_features):
+        self._poly_features = poly_features
+    
+    def load_data(self, file_path, schema=None, chunksize=None, max_rows=None, sample_fraction=None,
+                  random_state=42, use_cache=True):
+        """Load and prepare the dataset
+        
+        Only the columns in schema (DATA_SCHEMA, plus segment_id when the
+        file has it, by default) are read, parsed
+        straight into their compact dtypes. With use_cache the full file is
+        served from a columnar binary cache next to the CSV (see
+        data_cache.py), built on first load and memory-mapped afterwards;
+        if the cache cannot be written the CSV is read directly (see
+        read_dataset). Setting max_rows or sample_fraction reads the file in
+        chunks of chunksize rows: each row is kept with probability
+        sample_fraction, and at most max_rows rows are kept as a uniform
+        random sample of the file, so memory stays bounded however large the
+        file is. Kept rows stay in file order.
+        """
+        schema = schema or dataset_schema(file_path)
+        read_options = {'usecols': list(schema), 'dtype': schema}
+        if max_rows is None and sample_fraction is None and chunksize is None:
+            self.df = read_dataset(file_path, schema, use_cache)
+        else:
+            self.df = self._read_sampled(file_path, read_options, chunksize or 1_000_000,
+                                         max_rows, sample_fraction, random_state)
+        self.df = self.df[list(schema)]
+        self.dataset_rows = len(self.df)
+        self.dataset_path = file_path
+        # Sampled rows are not consecutive in time, so they cannot give future targets
+        self.dataset_is_contiguous = max_rows is None and sample_fraction is None
+        self.dataset_signature = file_signature(file_path)
+        self.dataset_sha256 = None
         print(f"Dataset loaded: {self.df.shape}")
         return self.df
     
+    def _read_sampled(self, file_path, read_options, chunksize, max_rows, sample_fraction, random_state):
+        """Stream the CSV in chunks, keeping a Bernoulli and/or bounded uniform sample"""
+        import pandas as pd
+        
+        rng = np.random.default_rng(random_state)
+        kept = None
+        for chunk in pd.read_csv(file_path, chunksize=chunksize, **read_options):
+            if sample_fraction is not None:
+                chunk = chunk[rng.random(len(chunk)) < sample_fraction]
+            if max_rows is not None:
+                # Bottom-k on random keys: the kept rows are a uniform sample of everything seen so far
+                chunk = chunk.assign(_sample_key=rng.random(len(chunk)))
+                kept = chunk if kept is None else pd.concat([kept, chunk])
+                if len(kept) > max_rows:
+                    keep = np.argpartition(kept['_sample_key'].to_numpy(), max_rows - 1)[:max_rows]
+                    kept = kept.iloc[np.sort(keep)]
+            else:
+                kept = chunk if kept is None else pd.concat([kept, chunk])
+        
+        if kept is None:
+            return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in read_options['dtype'].items()})
+        return kept.drop(columns='_sample_key', errors='ignore').reset_index(drop=True)
+    
     def prepare_features(self):
         """Prepare features for training"""
-        feature_cols = ['hour', 'day_of_week', 'is_weekend', 'rain_intensity', 
-                       'temperature', 'humidity', 'event_flag', 'rush_hour', 'avg_speed']
+        from sklearn.model_selection import train_test_split
+        
+        if self.df is None:
+            raise ValueError("No training data loaded; call load_data first")
+        
+        feature_cols = list(FEATURE_COLUMNS)
         
         X = self.df[feature_cols]
-        y = self.df['traffic_flow']
+        y = self.df[TARGET_COLUMN]
         
         self.feature_names = feature_cols
         
@@ -45,94 +438,690 @@ class TrafficPredictor:
         
         return X_train, X_test, y_train, y_test, X_train_scaled, X_test_scaled
     
-    def train_all_models(self):
-        """Train all 5 models and compare performance"""
+    def model_params(self, name):
+        """Parameters train_all_models and cross_validate pass to build_model:
+        the tuned hyperparameters, plus the KNN backend"""
+        params = dict(self.hyperparameters.get(name, {}))
+        if name == 'KNN Regressor':
+            params['algorithm'] = self.knn_backend or 'auto'
+        return params
+    
+    def inherit_training_config(self):
+        """Take the tuned hyperparameters and KNN backend of the registry's
+        active version, unless this predictor has its own
+        
+        Called when training starts, so a fresh predictor (the API's startup
+        training, python ml_models.py without --tune) keeps what an earlier
+        tuning run found instead of falling back to the defaults.
+        """
+        version = self.registry.current_version()
+        if version is None:
+            return
+        try:
+            manifest = self.registry.manifest(version)
+        except (OSError, ValueError):
+            return
+        if not self.hyperparameters and manifest.get('hyperparameters'):
+            self.hyperparameters = manifest['hyperparameters']
+            print(f"Using the tuned hyperparameters of version {version}")
+        if self.knn_backend is None:
+            self.knn_backend = manifest.get('knn_backend')
+    
+    def tune_hyperparameters(self, models=None, time_budget=TUNING_TIME_BUDGET, n_folds=3, factor=3, n_jobs=-1):
+        """Search hyperparameters with successive halving and cross-validation
+        
+        Searches the training split only (the test split stays untouched)
+        for every model in hyperparameter_search.SEARCH_SPACES, or the given
+        models, with trials in a pool of n_jobs processes. Winners go to
+        self.hyperparameters, so the next train_all_models uses them and
+        save_models records them with the version. Stops after time_budget
+        seconds (None for no limit); a model whose search stopped before
+        its full-budget rung keeps its current configuration, and its
+        partial rungs are only recorded in tuning_results.
+        """
+        X_train, _, y_train, _, _, _ = self.prepare_features()
+        results = search_hyperparameters(X_train, y_train, models=models, n_folds=n_folds, factor=factor,
+                                         time_budget=time_budget, n_jobs=n_jobs)
+        for name, result in results.items():
+            self.tuning_results[name] = result
+            if result['full_budget']:
+                self.hyperparameters[name] = result['params']
+            else:
+                # Cheap rungs favour configurations that learn fast, not ones that end up best
+                print(f"{name} was not tuned at its full budget; keeping its current hyperparameters")
+        return results
+    
+    def cross_validate(self, n_folds=5, strategy='kfold', models=None, n_jobs=-1):
+        """Compare the models over n_folds cross-validation folds
+        
+        strategy is 'kfold' (shuffled) or 'rolling' (rolling origin over the
+        time-ordered dataset; needs the full file, not a sample). Each
+        fold's scaled and polynomial matrices are built once and shared by
+        every model, and all (model, fold) fits run in a pool of n_jobs
+        processes. Models use their tuned hyperparameters, if any. The
+        report, also kept in cv_report and saved with the metrics, holds
+        per-fold metrics and fit/predict seconds plus their mean and spread.
+        """
+        if self.df is None:
+            raise ValueError("No training data loaded; call load_data first")
+        if strategy == 'rolling' and not self.dataset_is_contiguous:
+            raise ValueError("Rolling-origin folds need the full, time-ordered dataset")
+        
+        self.feature_names = list(FEATURE_COLUMNS)
+        self.inherit_training_config()
+        self.cv_report = cross_validate_models(
+            self.df[FEATURE_COLUMNS], self.df[TARGET_COLUMN], models or MODEL_NAMES, n_folds=n_folds,
+            strategy=strategy, hyperparameters={name: self.model_params(name) for name in MODEL_NAMES},
+            n_jobs=n_jobs
+        )
+        return self.cv_report
+    
+    def train_all_models(self, parallel=False, n_jobs=-1, keep_predictions=False, release_data=True):
+        """Train all 5 models and compare performance
+        
+        With parallel=True the four smaller models are fitted concurrently in
+        a process pool while the Random Forest builds its trees on n_jobs
+        cores. Every model is seeded, so the results match the serial run.
+        Models in self.hyperparameters use their tuned configuration; if
+        there are none, those of the registry's active version are used.
+        
+        Metrics are accumulated over EVAL_CHUNK_ROWS-row chunks of the test
+        set; each model's test predictions are only kept in results when
+        keep_predictions is set. With release_data the dataset and test
+        split are dropped once everything is fitted, so a predictor kept
+        around for serving does not hold the training set.
+        """
         X_train, X_test, y_train, y_test, X_train_scaled, X_test_scaled = self.prepare_features()
+        self.inherit_training_config()
         
-        print("Training Linear Regression...")
-        lr = LinearRegression()
-        lr.fit(X_train_scaled, y_train)
-        lr_pred = lr.predict(X_test_scaled)
-        self.models['Linear Regression'] = lr
-        
-        print("Training Polynomial Regression...")
-        X_train_poly = self.poly_features.fit_transform(X_train_scaled)
-        X_test_poly = self.poly_features.transform(X_test_scaled)
-        poly_lr = LinearRegression()
-        poly_lr.fit(X_train_poly, y_train)
-        poly_pred = poly_lr.predict(X_test_poly)
-        self.models['Polynomial Regression'] = poly_lr
-        
-        print("Training KNN Regressor...")
-        knn = KNeighborsRegressor(n_neighbors=5)
-        knn.fit(X_train_scaled, y_train)
-        knn_pred = knn.predict(X_test_scaled)
-        self.models['KNN Regressor'] = knn
-        
-        print("Training Decision Tree...")
-        dt = DecisionTreeRegressor(random_state=42, max_depth=10)
-        dt.fit(X_train, y_train)
-        dt_pred = dt.predict(X_test)
-        self.models['Decision Tree'] = dt
-        
-        print("Training Random Forest...")
-        rf = RandomForestRegressor(n_estimators=100, random_state=42, max_depth=15)
-        rf.fit(X_train, y_train)
-        rf_pred = rf.predict(X_test)
-        self.models['Random Forest'] = rf
-        
-        predictions = {
-            'Linear Regression': lr_pred,
-            'Polynomial Regression': poly_pred,
-            'KNN Regressor': knn_pred,
-            'Decision Tree': dt_pred,
-            'Random Forest': rf_pred
-        }
+        # Polynomial Regression expands the scaled matrix chunk by chunk itself; the
+        # fitted expansion is still saved for code that wants to apply it
+        self.poly_features.fit(X_train_scaled[:1])
+        matrices = {'raw': (X_train, X_test), 'scaled': (X_train_scaled, X_test_scaled)}
+        model_inputs = {name: matrices[MODEL_INPUTS[name]] for name in MODEL_NAMES}
+        
+        if parallel:
+            self.models = self._fit_models_parallel(model_inputs, y_train, n_jobs)
+        else:
+            for name in MODEL_NAMES:
+                print(f"Training {name}...")
+                self.models[name] = fit_model(name, model_inputs[name][0], y_train,
+                                              params=self.model_params(name))
+        # Starting point for partial_fit; not part of the model comparison
+        self.models[ONLINE_MODEL_NAME] = OnlineRegressor().fit(X_train.to_numpy(), y_train.to_numpy())
+        self.online_window = None
+        self.rows_since_refresh = 0
+        self.feature_importance = None
+        self.saved_feature_importance = []
+        self.permutation_importance = None
+        self.saved_permutation_importance = []
+        
+        # Parallelism is a training-time setting; keep the saved forest identical to a serial fit
+        self.models['Random Forest'].set_params(n_jobs=None)
+        self.reset_serving_state()
         
         self.results = {}
-        for name, pred in predictions.items():
-            mae = mean_absolute_error(y_test, pred)
-            rmse = np.sqrt(mean_squared_error(y_test, pred))
-            r2 = r2_score(y_test, pred)
-            
-            self.results[name] = {
-                'MAE': mae,
-                'RMSE': rmse,
-                'R2': r2,
-                'predictions': pred
-            }
+        for name in MODEL_NAMES:
+            metrics, predictions = evaluate(self.models[name], model_inputs[name][1], y_test,
+                                            EVAL_CHUNK_ROWS, keep_predictions)
+            self.results[name] = {metric: float(value) for metric, value in metrics.items()}
+            if keep_predictions:
+                self.results[name]['predictions'] = predictions
+        # The training matrices are not needed for the horizon and segment models
+        del model_inputs, matrices, X_train, y_train, X_train_scaled, X_test_scaled
         
         self.y_test = y_test
         self.X_test = X_test
+        self.compute_permutation_importance(X_test, y_test, n_jobs=n_jobs if parallel else 1)
+        
+        if self.dataset_is_contiguous:
+            self.train_horizon_model(n_jobs=n_jobs if parallel else None)
+        else:
+            print(f"Skipping {HORIZON_MODEL_NAME}: it needs the full, time-ordered dataset")
+            # A horizon model from an earlier run or loaded version would otherwise be saved again
+            self.models.pop(HORIZON_MODEL_NAME, None)
+            self.horizon_results = {}
+        
+        self.segment_engines = {}
+        self.segment_results = {}
+        self.segment_store = None
+        if SEGMENT_COLUMN in self.df.columns:
+            self.train_segment_models(n_jobs=n_jobs if parallel else None)
+        
+        if release_data:
+            self.release_training_data()
+        return self.results
+    
+    def release_training_data(self):
+        """Drop the dataset and test split; metrics, importances and models stay"""
+        self.df = None
+        self.X_test = None
+        self.y_test = None
+    
+    def train_segment_models(self, min_rows=SEGMENT_MIN_ROWS, n_jobs=None):
+        """Fit a compact forest for every segment with at least min_rows rows
+        
+        Segments are whatever SEGMENT_COLUMN holds, so a column of cluster
+        ids gives one model per cluster. Models are kept as ForestEngines,
+        with their held-out metrics in segment_results.
+        """
+        from sklearn.metrics import mean_absolute_error, r2_score
+        from sklearn.model_selection import train_test_split
+        
+        self.segment_engines = {}
+        self.segment_results = {}
+        groups = self.df.groupby(SEGMENT_COLUMN).indices
+        for segment, rows in sorted(groups.items()):
+            if len(rows) < min_rows:
+                continue
+            segment_df = self.df.iloc[rows]
+            X_train, X_test, y_train, y_test = train_test_split(
+                segment_df[FEATURE_COLUMNS], segment_df[TARGET_COLUMN], test_size=0.2, random_state=42
+            )
+            engine = ForestEngine.from_estimator(fit_model(SEGMENT_MODEL_NAME, X_train, y_train, n_jobs=n_jobs))
+            predictions = np.maximum(engine.predict(X_test.to_numpy()), 0)
+            key = str(segment)
+            self.segment_engines[key] = engine
+            self.segment_results[key] = {
+                'rows': int(len(rows)),
+                'MAE': float(mean_absolute_error(y_test, predictions)),
+                'R2': float(r2_score(y_test, predictions))
+            }
+        print(f"Trained {len(self.segment_engines)} {SEGMENT_MODEL_NAME} models; "
+              f"{len(groups) - len(self.segment_engines)} segments fall back to the global model")
+        return self.segment_results
+    
+    def train_horizon_model(self, n_jobs=None):
+        """Fit one multi-output forest forecasting flow FORECAST_HORIZONS minutes ahead
+        
+        Targets come from the records that follow each row of the
+        time-ordered dataset. Per-horizon test metrics go to horizon_results.
+        """
+        X_train, X_test, y_train, y_test = self._horizon_split(self.df)
+        
+        print(f"Training {HORIZON_MODEL_NAME}...")
+        model = fit_model(HORIZON_MODEL_NAME, X_train, y_train, n_jobs=n_jobs)
+        model.set_params(n_jobs=None)
+        metrics, _ = evaluate(model, X_test, y_test, EVAL_CHUNK_ROWS)
+        self.models[HORIZON_MODEL_NAME] = model
+        self.reset_serving_state()
+        
+        self.horizon_results = self._horizon_metrics(metrics)
+        return self.horizon_results
+    
+    @staticmethod
+    def _horizon_split(df):
+        """Train/test split of a time-ordered dataset's rows and their FORECAST_HORIZONS targets"""
+        from sklearn.model_selection import train_test_split
+        from data_generator import MINUTES_PER_RECORD
+        
+        targets = horizon_targets(df[TARGET_COLUMN].to_numpy(), FORECAST_HORIZONS, MINUTES_PER_RECORD)
+        X = df[FEATURE_COLUMNS].iloc[:len(targets)]
+        return train_test_split(X, targets, test_size=0.2, random_state=42)
+    
+    @staticmethod
+    def _horizon_metrics(metrics):
+        """Per-horizon metrics from evaluate's per-output arrays"""
+        return {
+            minutes: {metric: float(values[i]) for metric, values in metrics.items()}
+            for i, minutes in enumerate(FORECAST_HORIZONS)
+        }
+    
+    def evaluate_on_dataset(self, data_path):
+        """Recompute the current models' metrics on a changed dataset, without retraining
         
+        The file is split as train_all_models splits it, and every model is
+        scored on the test rows with the scaler it was trained with. Horizon
+        metrics and permutation importance are recomputed too. Only the
+        metrics held in memory change; the saved version keeps those of its
+        training run. Afterwards metrics_are_stale(data_path) is False
+        until the file changes again.
+        """
+        from sklearn.model_selection import train_test_split
+        
+        # Taken before reading, so a file rewritten meanwhile is still reported as stale
+        signature = file_signature(data_path)
+        sha256 = file_sha256(data_path)
+        df = read_dataset(data_path)
+        _, X_test, _, y_test = train_test_split(df[FEATURE_COLUMNS], df[TARGET_COLUMN], test_size=0.2,
+                                                random_state=42)
+        matrices = {'raw': X_test, 'scaled': self.scaler.transform(X_test)}
+        print(f"Evaluating the current models on {data_path} ({len(df)} rows)...")
+        results = {}
+        for name in MODEL_NAMES:
+            if name in self.models:
+                metrics, _ = evaluate(self.models[name], matrices[MODEL_INPUTS[name]], y_test, EVAL_CHUNK_ROWS)
+                results[name] = {metric: float(value) for metric, value in metrics.items()}
+        horizon_results = {}
+        if self.has_horizon_model():
+            _, X_horizon, _, y_horizon = self._horizon_split(df)
+            metrics, _ = evaluate(self.models[HORIZON_MODEL_NAME], X_horizon, y_horizon, EVAL_CHUNK_ROWS)
+            horizon_results = self._horizon_metrics(metrics)
+        if 'Random Forest' in self.models:
+            self.compute_permutation_importance(X_test, y_test, n_jobs=1)
+        
+        self.results = results
+        self.horizon_results = horizon_results
+        self.dataset_path = data_path
+        self.dataset_rows = len(df)
+        self.dataset_signature = signature
+        self.dataset_sha256 = sha256
         return self.results
     
+    def partial_fit(self, features, targets, refresh_forest=True):
+        """Learn from a mini-batch of newly observed rows without a full retrain
+        
+        features is a DataFrame or 2-D array as for predict_traffic_batch and
+        targets the observed traffic flow for each row. The Online SGD model
+        and its running scaler statistics are updated on every batch. The
+        batch also joins a window of the ONLINE_WINDOW_ROWS most recent
+        rows, and once FOREST_REFRESH_ROWS new rows have arrived the oldest
+        FOREST_REFRESH_TREES trees of the Random Forest are replaced by
+        trees grown on that window. Each batch is scored before the models
+        learn from it, so the returned MAEs track how stale they were.
+        """
+        features = self._feature_matrix(features)
+        targets = np.asarray(targets, dtype=np.float64).ravel()
+        if len(features) != len(targets):
+            raise ValueError(f"Got {len(features)} feature rows but {len(targets)} targets")
+        if len(features) == 0:
+            raise ValueError("No observations given")
+        
+        with self.update_lock:
+            update = {'rows': len(features)}
+            if 'Random Forest' in self.models:
+                update['forest_mae'] = float(np.mean(np.abs(self._predict_uncached(features) - targets)))
+            
+            online_model = self.models[ONLINE_MODEL_NAME] if ONLINE_MODEL_NAME in self.models else OnlineRegressor()
+            if online_model.n_samples_seen:
+                update['online_mae'] = float(np.mean(np.abs(online_model.predict(features) - targets)))
+            self.models[ONLINE_MODEL_NAME] = online_model.partial_fit(features, targets)
+            
+            if self.online_window is None:
+                self.online_window = ObservationWindow(len(FEATURE_COLUMNS), ONLINE_WINDOW_ROWS)
+            self.online_window.append(features, targets)
+            self.rows_since_refresh += len(features)
+            
+            update['forest_refreshed'] = False
+            if refresh_forest and 'Random Forest' in self.models and self.rows_since_refresh >= FOREST_REFRESH_ROWS:
+                self.forest_refreshes += 1
+                X_window, y_window = self.online_window.arrays()
+                # Built on a copy and swapped in, so predictions keep using the old forest meanwhile
+                self.models['Random Forest'] = regrow_forest(
+                    self.models['Random Forest'], X_window, y_window,
+                    FOREST_REFRESH_TREES, random_state=42 + self.forest_refreshes
+                )
+                self.reset_serving_state()
+                self.feature_importance = None
+                self.saved_feature_importance = []
+                self.permutation_importance = None
+                self.saved_permutation_importance = []
+                self.rows_since_refresh = 0
+                update['forest_refreshed'] = True
+            
+            update['window_rows'] = self.online_window.size
+            update['online_rows_seen'] = self.models[ONLINE_MODEL_NAME].n_samples_seen
+            return update
+    
+    def _fit_models_parallel(self, model_inputs, y_train, n_jobs):
+        """Fit the small models in worker processes while the forest uses all cores"""
+        from concurrent.futures import ProcessPoolExecutor
+        
+        workers = min(len(MODEL_NAMES) - 1, os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {}
+            for name in MODEL_NAMES:
+                if name != 'Random Forest':
+                    print(f"Training {name} (worker process)...")
+                    futures[name] = pool.submit(fit_model, name, model_inputs[name][0], y_train,
+                                                params=self.model_params(name))
+            
+            print(f"Training Random Forest (n_jobs={n_jobs})...")
+            forest = fit_model('Random Forest', model_inputs['Random Forest'][0], y_train, n_jobs=n_jobs,
+                               params=self.model_params('Random Forest'))
+            
+            fitted = {name: future.result() for name, future in futures.items()}
+        
+        fitted['Random Forest'] = forest
+        return {name: fitted[name] for name in MODEL_NAMES}
+    
     def get_feature_importance(self):
         """Get feature importance from Random Forest"""
+        if self.feature_importance is not None:
+            return self.feature_importance
+        import pandas as pd
+        if self.saved_feature_importance:
+            self.feature_importance = pd.DataFrame(self.saved_feature_importance)
+            return self.feature_importance
         if 'Random Forest' in self.models:
             rf_model = self.models['Random Forest']
             importance = rf_model.feature_importances_
-            feature_importance = pd.DataFrame({
-                'feature': self.feature_names,
+            self.feature_importance = pd.DataFrame({
+                'feature': self.feature_names or FEATURE_COLUMNS,
                 'importance': importance
             }).sort_values('importance', ascending=False)
-            return feature_importance
+            return self.feature_importance
+        return None
+    
+    def compute_permutation_importance(self, X_test, y_test, n_repeats=PERMUTATION_REPEATS,
+                                       sample_rows=PERMUTATION_SAMPLE_ROWS, n_jobs=-1, random_state=42):
+        """Permutation importance of the Random Forest's features
+        
+        Each feature's importance is the mean drop in R² over n_repeats
+        shuffles of that column, measured on a stratified subsample of the
+        test set with the flattened forest engine. Repeats run in a process
+        pool of n_jobs workers. The result is saved with the model version's
+        metrics, so it is only computed once per trained forest.
+        """
+        import pandas as pd
+        from sklearn.metrics import r2_score
+        
+        rows = stratified_sample(y_test, sample_rows, random_state=random_state)
+        X = np.ascontiguousarray(np.asarray(X_test, dtype=np.float32)[rows])
+        y = np.asarray(y_test, dtype=np.float64)[rows]
+        predict = self.get_forest_engine().predict
+        baseline = r2_score(y, predict(X))
+        seeds = np.random.SeedSequence(random_state).generate_state(n_repeats)
+        
+        workers = min(n_repeats, os.cpu_count() or 1) if n_jobs == -1 else min(n_repeats, n_jobs)
+        print(f"Computing permutation importance ({len(rows)} rows, {n_repeats} repeats, {workers} workers)...")
+        if workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                drops = list(pool.map(permutation_repeat, [predict] * n_repeats, [X] * n_repeats,
+                                      [y] * n_repeats, [baseline] * n_repeats, seeds))
+        else:
+            drops = [permutation_repeat(predict, X, y, baseline, seed) for seed in seeds]
+        
+        drops = np.array(drops)
+        self.permutation_importance = pd.DataFrame({
+            'feature': self.feature_names or FEATURE_COLUMNS,
+            'importance': drops.mean(axis=0),
+            'std': drops.std(axis=0)
+        }).sort_values('importance', ascending=False)
+        self.saved_permutation_importance = []
+        return self.permutation_importance
+    
+    def get_permutation_importance(self):
+        """Permutation importance saved with the loaded version, or computed
+        on the held-out test set of this process's training run; None if neither"""
+        if self.permutation_importance is not None:
+            return self.permutation_importance
+        import pandas as pd
+        if self.saved_permutation_importance:
+            self.permutation_importance = pd.DataFrame(self.saved_permutation_importance)
+            return self.permutation_importance
+        if 'Random Forest' in self.models and self.X_test is not None:
+            return self.compute_permutation_importance(self.X_test, self.y_test)
         return None
     
     def predict_traffic(self, hour, day_of_week, is_weekend, rain_intensity, 
-                       temperature, humidity, event_flag, rush_hour, avg_speed):
-        """Predict traffic using the best model (Random Forest)"""
+                       temperature, humidity, event_flag, rush_hour, avg_speed, return_std=False):
+        """Predict traffic using the best model (Random Forest)
+        
+        With return_std, returns (prediction, standard deviation of the
+        per-tree predictions).
+        """
         features = np.array([[hour, day_of_week, is_weekend, rain_intensity,
                             temperature, humidity, event_flag, rush_hour, avg_speed]])
         
+        if return_std:
+            prediction, std = self.predict_traffic_batch(features, return_std=True)
+            return prediction[0], std[0]
+        return self.predict_traffic_batch(features)[0]
+    
+    def _feature_matrix(self, features):
+        """Validated float64 (N, 9) matrix from a DataFrame or array of FEATURE_COLUMNS rows"""
+        if hasattr(features, 'columns'):
+            features = features[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+        else:
+            features = np.asarray(features, dtype=np.float64)
+        
+        if features.ndim != 2 or features.shape[1] != len(FEATURE_COLUMNS):
+            raise ValueError(f"Expected an (N, {len(FEATURE_COLUMNS)}) feature matrix, got shape {features.shape}")
+        return features
+    
+    def predict_traffic_batch(self, features, return_std=False, quantiles=None):
+        """Predict traffic for many scenarios in a single model call
+        
+        features is a DataFrame with the FEATURE_COLUMNS columns or a 2-D
+        array of rows in FEATURE_COLUMNS order. Returns an array of clipped
+        predictions, one per row.
+        
+        return_std and/or quantiles (e.g. (0.1, 0.9)) describe the spread of
+        the forest's per-tree predictions. The predictions are then followed
+        by the std array and/or an (N, len(quantiles)) array. The predictions
+        themselves still come from the configured backend and cache; the
+        spread is computed by the array engine, SPREAD_CHUNK_ROWS rows at a
+        time, and cached alongside.
+        """
+        features = self._feature_matrix(features)
+        if len(features) == 0:
+            predictions = np.empty(0)
+        elif self.prediction_cache is not None:
+            predictions = self._predict_cached(features, self.prediction_cache, self._predict_uncached)
+        else:
+            predictions = self._predict_uncached(features)
+        if return_std or quantiles is not None:
+            return (predictions, *self._spread('forest', self.get_forest_engine, features, return_std, quantiles))
+        return predictions
+    
+    def has_horizon_model(self):
+        return HORIZON_MODEL_NAME in self.models
+    
+    def predict_horizons_batch(self, features, return_std=False, quantiles=None):
+        """Forecast traffic FORECAST_HORIZONS minutes ahead for many scenarios
+        
+        features are the current conditions, as for predict_traffic_batch.
+        All horizons come from a single pass through the multi-output
+        forest. Returns an (N, len(FORECAST_HORIZONS)) array, plus spread
+        arrays as in predict_traffic_batch when requested.
+        """
+        features = self._feature_matrix(features)
+        if len(features) == 0:
+            predictions = np.empty((0, len(FORECAST_HORIZONS)))
+        elif self.horizon_cache is not None:
+            predictions = self._predict_cached(features, self.horizon_cache, self._predict_horizons_uncached)
+        else:
+            predictions = self._predict_horizons_uncached(features)
+        if return_std or quantiles is not None:
+            return (predictions, *self._spread('horizons', self.get_horizon_engine, features, return_std, quantiles))
+        return predictions
+    
+    def get_segment_model(self, segment):
+        """Engine for a segment, or None if it has no model of its own"""
+        key = str(segment)
+        if key in self.segment_engines:
+            return self.segment_engines[key]
+        if self.segment_store is not None:
+            return self.segment_store.get(key)
+        return None
+    
+    def predict_segments_batch(self, features, segments, return_std=False, quantiles=None):
+        """Predict each row with its segment's model, falling back to the global model
+        
+        segments holds one segment id (or None) per feature row. Returns the
+        predictions, then the std and quantile arrays if requested (as in
+        predict_traffic_batch), and last a boolean array marking rows served
+        by a segment model.
+        """
+        features = self._feature_matrix(features)
+        segments = list(segments)
+        if len(segments) != len(features):
+            raise ValueError(f"Got {len(features)} feature rows but {len(segments)} segments")
+        
+        with_spread = return_std or quantiles is not None
+        outputs = [np.empty(len(features))]
+        if return_std:
+            outputs.append(np.empty(len(features)))
+        if quantiles is not None:
+            outputs.append(np.empty((len(features), np.size(quantiles))))
+        
+        from_segment = np.zeros(len(features), dtype=bool)
+        groups = {}
+        for i, segment in enumerate(segments):
+            if segment is not None:
+                groups.setdefault(str(segment), []).append(i)
+        for segment, rows in groups.items():
+            engine = self.get_segment_model(segment)
+            if engine is not None:
+                if with_spread:
+                    spread = self._spread_uncached(engine, features[rows], quantiles)
+                    parts = (spread[..., 0], *self._split_spread(spread, return_std, quantiles))
+                else:
+                    parts = (np.maximum(engine.predict(features[rows]), 0),)
+                for output, part in zip(outputs, parts):
+                    output[rows] = part
+                from_segment[rows] = True
+        if not from_segment.all():
+            parts = self.predict_traffic_batch(features[~from_segment], return_std, quantiles)
+            for output, part in zip(outputs, parts if with_spread else (parts,)):
+                output[~from_segment] = part
+        return (*outputs, from_segment)
+    
+    def _spread(self, kind, get_engine, features, return_std, quantiles):
+        """Requested std and/or quantile arrays of an engine's per-tree predictions, cached
+        
+        kind names the engine in the cache keys; get_engine is only called
+        on a cache miss.
+        """
+        quantiles = None if quantiles is None else tuple(np.atleast_1d(quantiles).astype(float).tolist())
+        if self.spread_cache is not None and len(features):
+            spread = self._predict_cached(features, self.spread_cache,
+                                          lambda rows: self._spread_uncached(get_engine(), rows, quantiles),
+                                          key_prefix=(kind, quantiles))
+        else:
+            spread = self._spread_uncached(get_engine(), features, quantiles)
+        return self._split_spread(spread, return_std, quantiles)
+    
+    def _spread_uncached(self, engine, features, quantiles):
+        """Clipped mean, std and clipped quantiles of the per-tree predictions, stacked
+        on a last axis of size 2 + len(quantiles), computed SPREAD_CHUNK_ROWS rows at a time"""
+        chunks = []
+        # An empty matrix still makes one pass, so the result has the engine's output shape
+        for start in range(0, max(len(features), 1), SPREAD_CHUNK_ROWS):
+            mean, std, spread = engine.predict_spread(features[start:start + SPREAD_CHUNK_ROWS], quantiles)
+            parts = [np.maximum(mean, 0)[..., None], std[..., None]]
+            if quantiles is not None:
+                parts.append(np.maximum(spread, 0))
+            chunks.append(np.concatenate(parts, axis=-1))
+        return np.concatenate(chunks)
+    
+    @staticmethod
+    def _split_spread(spread, return_std, quantiles):
+        """The std and/or quantile arrays requested, from a _spread_uncached result"""
+        outputs = []
+        if return_std:
+            outputs.append(spread[..., 1])
+        if quantiles is not None:
+            outputs.append(spread[..., 2:])
+        return tuple(outputs)
+    
+    def _predict_cached(self, features, cache, predict_fn, key_prefix=()):
+        """Serve repeated scenarios from cache and run predict_fn only on the misses
+        
+        key_prefix tells apart different outputs stored in the same cache.
+        """
+        snapped, keys = cache.quantize(features)
+        if key_prefix:
+            keys = [key_prefix + key for key in keys]
+        cached, generation = cache.get_many(keys)
+        
+        misses = [i for i, value in enumerate(cached) if value is None]
+        if misses:
+            computed = predict_fn(snapped[misses])
+            cache.put_many([keys[i] for i in misses], list(computed), generation)
+            for i, value in zip(misses, computed):
+                cached[i] = value
+        return np.array(cached)
+    
+    def _predict_uncached(self, features):
+        """Run the configured backend on a validated feature matrix"""
+        grid = self.get_prediction_grid() if self.backend == 'grid' else None
+        if grid is not None and self.grid_within_budget(grid):
+            predictions = grid.predict(features)
+        elif self.backend in ('compiled', 'grid') and len(features) <= COMPILED_MAX_ROWS:
+            predictions = self.get_forest_engine().predict(features)
+        else:
+            predictions = self.models['Random Forest'].predict(features)
+        return np.maximum(predictions, 0)
+    
+    def _predict_horizons_uncached(self, features):
+        """Multi-output forest on a validated feature matrix; the grid backend has no horizon table"""
+        if self.backend == 'compiled' and len(features) <= COMPILED_MAX_ROWS:
+            predictions = self.get_horizon_engine().predict(features)
+        else:
+            predictions = self.models[HORIZON_MODEL_NAME].predict(features)
+        return np.maximum(predictions, 0)
+    
+    def reset_serving_state(self):
+        """Drop everything derived from the current models after they change"""
+        with self.serving_lock:
+            self.serving_generation += 1
+            self.forest_engine = None
+            self.horizon_engine = None
+            self.prediction_grid = None
+        for cache in (self.prediction_cache, self.horizon_cache, self.spread_cache):
+            if cache is not None:
+                cache.clear()
+    
+    def _serving_artifact(self, attribute, build):
+        """The engine or grid held in attribute, built on first use
+        
+        Models can be swapped (partial_fit, load_models) while one is being
+        built; the result is then still returned to the caller that built
+        it, but only kept if reset_serving_state has not run in between, so
+        an artifact of swapped-out models is never served afterwards.
+        """
+        artifact = getattr(self, attribute)
+        if artifact is None:
+            generation = self.serving_generation
+            artifact = build()
+            with self.serving_lock:
+                if generation == self.serving_generation:
+                    setattr(self, attribute, artifact)
+        return artifact
+    
+    def get_prediction_grid(self):
+        """Lookup table of Random Forest predictions, built on first use"""
+        return self._serving_artifact('prediction_grid', self._build_prediction_grid)
+    
+    def _build_prediction_grid(self):
         rf_model = self.models['Random Forest']
-        prediction = rf_model.predict(features)[0]
-        return max(0, prediction)
+        grid = PredictionGrid.build(lambda X: np.maximum(rf_model.predict(X), 0), self.grid_axes)
+        print(f"Prediction grid built: {grid.table.size:,} cells, {grid.nbytes / 1e6:.1f} MB, "
+              f"max error {grid.max_error:.1f} vehicles/hour in {grid.build_seconds:.1f}s")
+        if not self.grid_within_budget(grid):
+            print(f"Prediction grid exceeds its {self.grid_max_error} vehicles/hour error budget; "
+                  f"serving the compiled forest instead")
+        return grid
+    
+    def grid_within_budget(self, grid=None):
+        """True if the prediction grid's max error is within grid_max_error (None: no budget)"""
+        if grid is None:
+            grid = self.get_prediction_grid()
+        return self.grid_max_error is None or grid.max_error <= self.grid_max_error
+    
+    def get_forest_engine(self):
+        """Array-backed copy of the Random Forest, built on first use"""
+        return self._serving_artifact('forest_engine',
+                                      lambda: ForestEngine.from_estimator(self.models['Random Forest']))
     
-    def calculate_route_score(self, predicted_traffic, avg_speed, rain_intensity, event_impact):
-        """Calculate route score using the weighted formula"""
+    def get_horizon_engine(self):
+        """Array-backed copy of the multi-horizon forest, built on first use"""
+        return self._serving_artifact('horizon_engine',
+                                      lambda: ForestEngine.from_estimator(self.models[HORIZON_MODEL_NAME]))
+    
+    def calculate_route_score(self, predicted_traffic, avg_speed, rain_intensity, event_impact,
+                              traffic_std=0.0, risk_aversion=1.0):
+        """Calculate route score using the weighted formula
+        
+        With a traffic_std, the score is risk-adjusted: traffic is taken
+        as predicted_traffic + risk_aversion * traffic_std.
+        """
         max_traffic = 800  # Based on dataset
         max_speed = 60
+        predicted_traffic = predicted_traffic + risk_aversion * traffic_std
         
         w1, w2, w3, w4 = 0.4, 0.3, 0.2, 0.1
         
@@ -143,31 +1132,232 @@ class TrafficPredictor:
         
         return min(100, max(0, score * 100))
     
-    def save_models(self):
-        """Save trained models"""
-        joblib.dump(self.models, 'trained_models.pkl')
-        joblib.dump(self.scaler, 'scaler.pkl')
-        joblib.dump(self.poly_features, 'poly_features.pkl')
-        print("Models saved successfully!")
+    def save_models(self, activate=True):
+        """Publish the trained models as a new registry version
+        
+        Everything is written to a staging directory first, with the
+        manifest last, and the finished directory is renamed into the
+        registry in one step. With activate, the registry's CURRENT pointer
+        then moves to the new version. Returns the version name.
+        """
+        staging_dir = self.registry.create_staging()
+        try:
+            files = {}
+            os.makedirs(os.path.join(staging_dir, MODELS_DIR))
+            for name in MODEL_NAMES + [ONLINE_MODEL_NAME, HORIZON_MODEL_NAME]:
+                if name in self.models:
+                    files[name] = model_filename(name)
+                    joblib.dump(self.models[name], os.path.join(staging_dir, MODELS_DIR, files[name]))
+            joblib.dump(self.scaler, os.path.join(staging_dir, SCALER_PATH))
+            joblib.dump(self.poly_features, os.path.join(staging_dir, POLY_FEATURES_PATH))
+            if 'Random Forest' in self.models:
+                self.get_forest_engine().save(os.path.join(staging_dir, FOREST_ENGINE_DIR))
+            if self.has_horizon_model():
+                self.get_horizon_engine().save(os.path.join(staging_dir, HORIZON_ENGINE_DIR))
+            if self.segment_engines:
+                SegmentModelStore.save(os.path.join(staging_dir, SEGMENT_MODELS_DIR),
+                                       self.segment_engines, self.segment_results)
+            
+            results = {
+                name: {metric: float(value) for metric, value in scores.items() if metric != 'predictions'}
+                for name, scores in self.results.items()
+            }
+            feature_importance = self.get_feature_importance()
+            permutation_importance = self.get_permutation_importance()
+            # Only vouch for the content while the file is still the one that was loaded
+            if (self.dataset_sha256 is None and self.dataset_path
+                    and file_signature(self.dataset_path) == self.dataset_signature):
+                self.dataset_sha256 = file_sha256(self.dataset_path)
+            metrics = {
+                'results': results,
+                'feature_importance': feature_importance.to_dict('records') if feature_importance is not None else [],
+                'permutation_importance': (permutation_importance.to_dict('records')
+                                           if permutation_importance is not None else []),
+                'feature_names': list(self.feature_names),
+                'dataset_signature': self.dataset_signature,
+                'dataset_sha256': self.dataset_sha256,
+                'hyperparameters': self.hyperparameters,
+                'tuning_results': self.tuning_results,
+                'cross_validation': self.cv_report,
+                'horizon_results': {
+                    minutes: {metric: float(value) for metric, value in scores.items()}
+                    for minutes, scores in self.horizon_results.items()
+                }
+            }
+            joblib.dump(metrics, os.path.join(staging_dir, METRICS_PATH))
+            
+            dataset = None
+            if self.dataset_path and os.path.exists(self.dataset_path):
+                dataset = {
+                    'path': os.path.abspath(self.dataset_path),
+                    'sha256': self.dataset_sha256,
+                    'rows': self.dataset_rows
+                }
+            manifest = {
+                'models': files,
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'metrics': results,
+                'hyperparameters': self.hyperparameters,
+                'knn_backend': self.knn_backend or 'auto',
+                'horizons': list(FORECAST_HORIZONS) if self.has_horizon_model() else [],
+                'segments': sorted(self.segment_engines),
+                'dataset': dataset
+            }
+            with open(os.path.join(staging_dir, MANIFEST_PATH), 'w') as f:
+                json.dump(manifest, f, indent=2)
+        except:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+        
+        self.version = self.registry.publish(staging_dir, activate=activate)
+        self.artifact_dir = self.registry.version_dir(self.version)
+        self.artifact_signature = self.current_artifact_signature()
+        print(f"Models saved successfully as version {self.version}!")
+        return self.version
     
-    def load_models(self):
-        """Load pre-trained models"""
+    def load_models(self, mmap_mode=None, version=None):
+        """Load pre-trained models
+        
+        Loads the given registry version, by default the one CURRENT points
+        at, or artifacts saved in the working directory before the registry
+        existed. Only the manifest is read here; each model is unpickled the
+        first time it is used, so a process that only serves Random Forest
+        predictions never loads KNN's copy of the training set. With
+        mmap_mode='r' the saved arrays are memory-mapped instead of copied,
+        so several worker processes share one set of pages. The compiled
+        backend serves straight from the mapped forest_engine arrays and
+        does not need the forest pickle at all.
+        """
         try:
-            self.models = joblib.load('trained_models.pkl')
-            self.scaler = joblib.load('scaler.pkl')
-            self.poly_features = joblib.load('poly_features.pkl')
-            print("Models loaded successfully!")
+            version = version or self.registry.current_version()
+            artifact_dir = self.registry.version_dir(version) if version else '.'
+            manifest_path = os.path.join(artifact_dir, MANIFEST_PATH)
+            models_dir = os.path.join(artifact_dir, MODELS_DIR)
+            if os.path.exists(manifest_path):
+                with open(manifest_path) as f:
+                    files = json.load(f)['models']
+                missing = [path for path in files.values() if not os.path.exists(os.path.join(models_dir, path))]
+                if missing:
+                    raise FileNotFoundError(f"Model artifacts missing: {missing}")
+                self.models = LazyModels(models_dir, files, mmap_mode=mmap_mode)
+            else:
+                self.models = joblib.load(os.path.join(artifact_dir, LEGACY_MODELS_PATH), mmap_mode=mmap_mode)
+            self.artifact_dir = artifact_dir
+            self.version = version
+            self.reset_serving_state()
+            engine_dir = os.path.join(artifact_dir, FOREST_ENGINE_DIR)
+            # The grid backend falls back to the compiled forest when over its error budget
+            if self.backend in ('compiled', 'grid') and os.path.isdir(engine_dir):
+                self.forest_engine = ForestEngine.load(engine_dir, mmap_mode=mmap_mode)
+            horizon_engine_dir = os.path.join(artifact_dir, HORIZON_ENGINE_DIR)
+            if self.backend == 'compiled' and os.path.isdir(horizon_engine_dir):
+                self.horizon_engine = ForestEngine.load(horizon_engine_dir, mmap_mode=mmap_mode)
+            segment_dir = os.path.join(artifact_dir, SEGMENT_MODELS_DIR)
+            self.segment_engines = {}
+            self.segment_store = None
+            if os.path.isdir(segment_dir):
+                self.segment_store = SegmentModelStore(segment_dir, self.segment_memory_budget)
+            self.segment_results = self.segment_store.index if self.segment_store is not None else {}
+            if self.backend == 'grid':
+                self.get_prediction_grid()
+            for path in (SCALER_PATH, POLY_FEATURES_PATH):
+                if not os.path.exists(os.path.join(artifact_dir, path)):
+                    raise FileNotFoundError(path)
+            self.scaler = None
+            self.poly_features = None
+            self.saved_preprocessors = True
+            self.load_metrics()
+            self.artifact_signature = self.current_artifact_signature()
+            print(f"Models loaded successfully{f' (version {version})' if version else ''}!")
             return True
         except:
             print("No saved models found. Please train models first.")
             return False
+    
+    def load_metrics(self):
+        """Load evaluation metrics and feature importance saved by save_models"""
+        self.results = {}
+        self.horizon_results = {}
+        self.feature_importance = None
+        self.saved_feature_importance = []
+        self.permutation_importance = None
+        self.saved_permutation_importance = []
+        self.dataset_signature = None
+        self.dataset_sha256 = None
+        self.feature_names = list(FEATURE_COLUMNS)
+        metrics_path = os.path.join(self.artifact_dir, METRICS_PATH)
+        if not os.path.exists(metrics_path):
+            return False
+        
+        metrics = joblib.load(metrics_path)
+        self.results = metrics['results']
+        self.feature_names = metrics['feature_names'] or list(FEATURE_COLUMNS)
+        self.dataset_signature = metrics['dataset_signature']
+        self.dataset_sha256 = metrics.get('dataset_sha256')
+        manifest_path = os.path.join(self.artifact_dir, MANIFEST_PATH)
+        if self.dataset_sha256 is None and os.path.exists(manifest_path):
+            # Versions saved before the metrics carried the hash have it in the manifest
+            with open(manifest_path) as f:
+                self.dataset_sha256 = (json.load(f).get('dataset') or {}).get('sha256')
+        self.saved_feature_importance = metrics['feature_importance']
+        self.saved_permutation_importance = metrics.get('permutation_importance', [])
+        self.horizon_results = metrics.get('horizon_results', {})
+        self.hyperparameters = metrics.get('hyperparameters', {})
+        self.tuning_results = metrics.get('tuning_results', {})
+        self.cv_report = metrics.get('cross_validation')
+        return True
+    
+    def current_artifact_signature(self):
+        """Signature of the active artifacts: the registry's current version,
+        plus the pre-registry model and metrics files"""
+        return (self.registry.current_version(), file_signature(MANIFEST_PATH),
+                file_signature(LEGACY_MODELS_PATH), file_signature(METRICS_PATH))
+    
+    def artifacts_changed(self):
+        """True if the active artifacts differ from the ones this instance loaded or saved"""
+        return self.current_artifact_signature() != self.artifact_signature
+    
+    def metrics_are_stale(self, data_path):
+        """True if there are no metrics or they were computed on a different dataset
+        
+        As in data_cache.cache_is_valid, a file whose size matches but whose
+        mtime moved (a touch, copy or checkout) is compared by content hash,
+        and is only stale if the hash differs too.
+        """
+        if not self.results:
+            return True
+        signature = file_signature(data_path)
+        if signature == self.dataset_signature:
+            return False
+        if (signature is None or self.dataset_signature is None or self.dataset_sha256 is None
+                or signature[0] != self.dataset_signature[0]):
+            return True
+        if file_sha256(data_path) != self.dataset_sha256:
+            return True
+        # Same content: remember the new mtime so the hash is not recomputed on every check
+        self.dataset_signature = signature
+        return False
 
-def main():
+def main(parallel=False, tune=False, cv=False):
     predictor = TrafficPredictor()
     
     predictor.load_data('traffic_data.csv')
     
-    results = predictor.train_all_models()
+    if tune:
+        predictor.tune_hyperparameters()
+    
+    if cv:
+        report = predictor.cross_validate()
+        print("\n" + "="*60)
+        print(f"{report['n_folds']}-FOLD CROSS-VALIDATION ({report['strategy']}, {report['wall_s']:.1f}s)")
+        print("="*60)
+        for model_name, model_report in report['models'].items():
+            summary = model_report['summary']
+            print(f"{model_name:22} MAE {summary['MAE']:6.2f} ± {summary['MAE_std']:5.2f}  "
+                  f"R² {summary['R2']:.4f} ± {summary['R2_std']:.4f}  "
+                  f"fit {summary['fit_s']:6.2f}s  predict {summary['predict_ms_per_1k']:7.2f} ms/1k rows")
+    
+    results = predictor.train_all_models(parallel=parallel)
     
     print("\n" + "="*60)
     print("MODEL COMPARISON RESULTS")
@@ -186,6 +1376,20 @@ def main():
     for _, row in feature_imp.iterrows():
         print(f"{row['feature']:15}: {row['importance']:.4f}")
     
+    permutation_imp = predictor.get_permutation_importance()
+    print(f"\n{'='*60}")
+    print("PERMUTATION IMPORTANCE (drop in R² when shuffled)")
+    print("="*60)
+    for _, row in permutation_imp.iterrows():
+        print(f"{row['feature']:15}: {row['importance']:.4f} ± {row['std']:.4f}")
+    
+    if predictor.horizon_results:
+        print(f"\n{'='*60}")
+        print(f"FORECAST HORIZONS ({HORIZON_MODEL_NAME})")
+        print("="*60)
+        for minutes, metrics in predictor.horizon_results.items():
+            print(f"+{minutes:2d} min: MAE {metrics['MAE']:6.2f}  RMSE {metrics['RMSE']:6.2f}  R² {metrics['R2']:.4f}")
+    
     predictor.save_models()
     
     print(f"\n{'='*60}")
@@ -206,4 +1410,4 @@ def main():
     print(f"Route Efficiency Score: {route_score:.1f}/100")
 
 if __name__ == "__main__":
-    main()
+    main(parallel='--parallel' in sys.argv, tune='--tune' in sys.argv, cv='--cv' in sys.argv)
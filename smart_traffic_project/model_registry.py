@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Versioned model registry
+
+Every save_models call writes a complete artifact set into a staging
+directory, renames it to versions/vNNNN and only then moves the CURRENT
+pointer, so readers never see a half-written version. Versions are never
+modified after publishing; activating or rolling back just rewrites
+CURRENT.
+
+    model_registry/
+    ├── CURRENT            # name of the active version
+    └── versions/
+        ├── v0001/         # models/, scaler.pkl, poly_features.pkl, ...
+        └── v0002/
+
+    python model_registry.py list
+    python model_registry.py activate v0001
+    python model_registry.py rollback
+    python model_registry.py prune --keep 5
+"""
+
+import argparse
+import json
+import os
+import shutil
+import uuid
+
+REGISTRY_DIR = 'model_registry'
+CURRENT_FILE = 'CURRENT'
+VERSIONS_DIR = 'versions'
+# Relative to a version directory; written last by save_models
+VERSION_MANIFEST = os.path.join('models', 'manifest.json')
+
+class ModelRegistry:
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = root
+        self.versions_dir = os.path.join(root, VERSIONS_DIR)
+        self.current_path = os.path.join(root, CURRENT_FILE)
+
+    def versions(self):
+        """Published versions, oldest first"""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(name for name in os.listdir(self.versions_dir) if name.startswith('v'))
+
+    def version_dir(self, version):
+        path = os.path.join(self.versions_dir, version)
+        if not os.path.isdir(path):
+            raise ValueError(f"Unknown model version: {version}")
+        return path
+
+    def current_version(self):
+        """Active version, or None before anything was published"""
+        try:
+            with open(self.current_path) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def manifest(self, version):
+        with open(os.path.join(self.version_dir(version), VERSION_MANIFEST)) as f:
+            return json.load(f)
+
+    def create_staging(self):
+        """Empty directory to write a new version into before publishing it"""
+        path = os.path.join(self.root, f'.staging-{uuid.uuid4().hex}')
+        os.makedirs(path)
+        return path
+
+    def publish(self, staging_dir, activate=True):
+        """Give a fully written staging directory the next version number"""
+        os.makedirs(self.versions_dir, exist_ok=True)
+        while True:
+            existing = self.versions()
+            number = int(existing[-1][1:]) + 1 if existing else 1
+            version = f'v{number:04d}'
+            target = os.path.join(self.versions_dir, version)
+            try:
+                os.rename(staging_dir, target)
+                break
+            except OSError:
+                # Another process published this number first; take the next one
+                if not os.path.exists(target):
+                    raise
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version):
+        """Point CURRENT at version; readers see either the old or the new name, never a partial write"""
+        self.version_dir(version)
+        tmp_path = f'{self.current_path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(version + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.current_path)
+        return version
+
+    def rollback(self):
+        """Activate the newest version older than the current one"""
+        current = self.current_version()
+        older = [version for version in self.versions() if current is None or version < current]
+        if not older:
+            raise ValueError(f"No version older than {current} to roll back to")
+        return self.activate(older[-1])
+
+    def prune(self, keep=5):
+        """Delete all but the newest keep versions, never the active one"""
+        current = self.current_version()
+        versions = self.versions()
+        removed = [version for version in versions[:max(0, len(versions) - keep)] if version != current]
+        for version in removed:
+            shutil.rmtree(os.path.join(self.versions_dir, version))
+        return removed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['list', 'activate', 'rollback', 'prune'])
+    parser.add_argument('version', nargs='?')
+    parser.add_argument('--registry', default=REGISTRY_DIR)
+    parser.add_argument('--keep', type=int, default=5)
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry)
+    if args.command == 'list':
+        current = registry.current_version()
+        for version in registry.versions():
+            manifest = registry.manifest(version)
+            r2 = manifest.get('metrics', {}).get('Random Forest', {}).get('R2')
+            print(f"{'*' if version == current else ' '} {version}  {manifest.get('created_at', '')}  "
+                  f"Random Forest R2={r2 if r2 is None else round(r2, 4)}")
+    elif args.command == 'activate':
+        if not args.version:
+            parser.error("activate needs a version")
+        print(f"Active version: {registry.activate(args.version)}")
+    elif args.command == 'rollback':
+        print(f"Active version: {registry.rollback()}")
+    else:
+        print(f"Removed: {', '.join(registry.prune(args.keep)) or 'nothing'}")
+
+if __name__ == "__main__":
+    main()
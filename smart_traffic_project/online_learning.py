@@ -0,0 +1,96 @@
+import copy
+
+import numpy as np
+
+class OnlineRegressor:
+    """Polynomial SGD regressor that learns from mini-batches with partial_fit
+
+    Inputs and target are standardized with running means and variances
+    (StandardScaler.partial_fit), so every batch updates the scaling
+    statistics as well as the weights and nothing is ever refitted from
+    scratch. A constant learning rate keeps the model tracking drift
+    instead of freezing as the stream grows.
+    """
+
+    def __init__(self, degree=2, eta0=0.001, random_state=42):
+        from sklearn.linear_model import SGDRegressor
+        from sklearn.preprocessing import PolynomialFeatures, StandardScaler
+
+        self.scaler = StandardScaler()
+        self.target_scaler = StandardScaler()
+        self.poly_features = PolynomialFeatures(degree=degree, include_bias=False)
+        self.model = SGDRegressor(learning_rate='constant', eta0=eta0, random_state=random_state)
+        self.n_samples_seen = 0
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # joblib may hand back read-only memory maps, but SGD updates its weights in place
+        for component in (self.scaler, self.target_scaler, self.model):
+            for name, value in vars(component).items():
+                if isinstance(value, np.ndarray) and not value.flags.writeable:
+                    setattr(component, name, np.array(value))
+
+    def _expand(self, X):
+        return self.poly_features.fit_transform(self.scaler.transform(X))
+
+    def partial_fit(self, X, y):
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64).reshape(-1, 1)
+        self.scaler.partial_fit(X)
+        self.target_scaler.partial_fit(y)
+        self.model.partial_fit(self._expand(X), self.target_scaler.transform(y).ravel())
+        self.n_samples_seen += len(X)
+        return self
+
+    def fit(self, X, y, batch_size=1000):
+        """Stream X, y through partial_fit in batches"""
+        for start in range(0, len(X), batch_size):
+            self.partial_fit(X[start:start + batch_size], y[start:start + batch_size])
+        return self
+
+    def predict(self, X):
+        scaled = self.model.predict(self._expand(np.asarray(X, dtype=np.float64)))
+        return self.target_scaler.inverse_transform(scaled.reshape(-1, 1)).ravel()
+
+class ObservationWindow:
+    """Ring buffer holding the most recent max_rows observations"""
+
+    def __init__(self, n_features, max_rows=50000):
+        self.X = np.empty((max_rows, n_features), dtype=np.float32)
+        self.y = np.empty(max_rows, dtype=np.float32)
+        self.max_rows = max_rows
+        self.next_row = 0
+        self.size = 0
+
+    def append(self, X, y):
+        # Only the newest max_rows of an oversized batch can survive
+        X, y = X[-self.max_rows:], y[-self.max_rows:]
+        rows = (self.next_row + np.arange(len(X))) % self.max_rows
+        self.X[rows] = X
+        self.y[rows] = y
+        self.next_row = (self.next_row + len(X)) % self.max_rows
+        self.size = min(self.size + len(X), self.max_rows)
+
+    def arrays(self):
+        """Buffered rows, oldest first"""
+        if self.size < self.max_rows:
+            return self.X[:self.size], self.y[:self.size]
+        order = np.roll(np.arange(self.max_rows), -self.next_row)
+        return self.X[order], self.y[order]
+
+def regrow_forest(forest, X, y, n_new_trees, random_state):
+    """Copy of a fitted random forest with its n_new_trees oldest trees
+    replaced by trees grown on X, y via warm start
+
+    The forest passed in is left untouched, so it can keep serving
+    predictions while the replacement is built.
+    """
+    n_trees = len(forest.estimators_)
+    refreshed = copy.copy(forest)
+    refreshed.estimators_ = list(forest.estimators_)
+    refreshed.set_params(warm_start=True, n_estimators=n_trees + n_new_trees,
+                         random_state=random_state)
+    refreshed.fit(X, y)
+    refreshed.estimators_ = refreshed.estimators_[n_new_trees:]
+    refreshed.set_params(warm_start=False, n_estimators=n_trees)
+    return refreshed
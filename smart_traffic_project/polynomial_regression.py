@@ -0,0 +1,86 @@
+import numpy as np
+
+# Singular values of X'X below this fraction of the largest are dropped by
+# the solve: X holds float32 values, so directions that are only nonzero
+# through float32 rounding (x² of a 0/1 flag is x again) must not pick up
+# huge coefficients. Squared, since X'X squares X's singular values.
+GRAM_RCOND = (100 * np.finfo(np.float32).eps) ** 2
+
+# Rows of a chunk converted to float64 at a time for the X'X product
+GRAM_BLOCK_ROWS = 4096
+
+class PolynomialRegression:
+    """Least-squares regression on degree-2 polynomial features, fitted chunk by chunk
+
+    Equivalent to LinearRegression on PolynomialFeatures(degree=2,
+    include_bias=False).fit_transform(X), without ever materializing that
+    expansion: each chunk of chunk_rows rows is expanded into a reusable
+    float32 buffer and folded into the normal equations X'X and X'y, whose
+    per-chunk products and running sums are float64, solved once at the end
+    with a float32-level cutoff (GRAM_RCOND). Memory is
+    chunk_rows x n_terms for the buffer, a float64 copy of GRAM_BLOCK_ROWS
+    of its rows, plus n_terms² for X'X, however many rows are fitted.
+    """
+
+    def __init__(self, chunk_rows=50_000):
+        self.chunk_rows = chunk_rows
+        self.coef_ = None
+        self.intercept_ = 0.0
+        self.n_features_in_ = None
+
+    def get_params(self, deep=True):
+        return {'chunk_rows': self.chunk_rows}
+
+    def set_params(self, **params):
+        for name, value in params.items():
+            if name not in self.get_params():
+                raise ValueError(f"Invalid parameter {name} for PolynomialRegression")
+            setattr(self, name, value)
+        return self
+
+    @staticmethod
+    def n_terms(n_features):
+        """Linear plus pairwise-product terms, as PolynomialFeatures(degree=2, include_bias=False)"""
+        return n_features + n_features * (n_features + 1) // 2
+
+    def _expand(self, X, out):
+        """Write [1, x, x_i * x_j for i <= j] for each row of X into out[:len(X)]"""
+        n, d = X.shape
+        out = out[:n]
+        out[:, 0] = 1
+        out[:, 1:d + 1] = X
+        column = d + 1
+        # Same term order as PolynomialFeatures: x0², x0x1, ..., x0x(d-1), x1², ...
+        for i in range(d):
+            np.multiply(out[:, 1 + i:2 + i], out[:, 1 + i:d + 1], out=out[:, column:column + d - i])
+            column += d - i
+        return out
+
+    def _chunks(self, X):
+        X = np.asarray(X)
+        buffer = np.empty((min(self.chunk_rows, len(X)), 1 + self.n_terms(X.shape[1])), dtype=np.float32)
+        for start in range(0, len(X), self.chunk_rows):
+            yield start, self._expand(X[start:start + self.chunk_rows], buffer)
+
+    def fit(self, X, y):
+        y = np.asarray(y, dtype=np.float64)
+        self.n_features_in_ = np.asarray(X).shape[1]
+        size = 1 + self.n_terms(self.n_features_in_)
+        gram = np.zeros((size, size))
+        moment = np.zeros(size)
+        for start, chunk in self._chunks(X):
+            for offset in range(0, len(chunk), GRAM_BLOCK_ROWS):
+                block = chunk[offset:offset + GRAM_BLOCK_ROWS].astype(np.float64)
+                gram += block.T @ block
+                moment += block.T @ y[start + offset:start + offset + len(block)]
+        # Collinear terms (x² of a 0/1 flag equals x) fall under the cutoff
+        solution = np.linalg.lstsq(gram, moment, rcond=GRAM_RCOND)[0]
+        self.intercept_ = float(solution[0])
+        self.coef_ = solution[1:].astype(np.float32)
+        return self
+
+    def predict(self, X):
+        predictions = np.empty(len(X))
+        for start, chunk in self._chunks(X):
+            predictions[start:start + len(chunk)] = chunk[:, 1:] @ self.coef_ + self.intercept_
+        return predictions
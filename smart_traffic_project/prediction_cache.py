@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Quantization step per feature, in ml_models.FEATURE_COLUMNS order. These
+# match the precision traffic_data.csv is generated with.
+DEFAULT_QUANTIZATION = {
+    'hour': 1,
+    'day_of_week': 1,
+    'is_weekend': 1,
+    'rain_intensity': 0.01,
+    'temperature': 0.1,
+    'humidity': 0.1,
+    'event_flag': 1,
+    'rush_hour': 1,
+    'avg_speed': 0.1
+}
+
+class PredictionCache:
+    """Thread-safe LRU cache of predictions keyed on quantized feature rows
+
+    Entries older than ttl seconds are treated as misses. clear() bumps a
+    generation counter so a prediction computed against models that were
+    swapped out mid-request is never stored.
+    """
+
+    def __init__(self, max_size=4096, ttl=None, quantization=None):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        unknown = set(quantization or {}) - set(DEFAULT_QUANTIZATION)
+        if unknown:
+            raise ValueError(f"Unknown features in quantization: {sorted(unknown)}")
+        steps = {**DEFAULT_QUANTIZATION, **(quantization or {})}
+        self.steps = np.array(list(steps.values()), dtype=np.float64)
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def quantize(self, features):
+        """Snap an (N, 9) matrix onto the quantization grid; returns (snapped rows, keys)"""
+        buckets = np.rint(np.asarray(features, dtype=np.float64) / self.steps).astype(np.int64)
+        return buckets * self.steps, [tuple(row) for row in buckets.tolist()]
+
+    def get_many(self, keys):
+        """Cached values for keys, with None for misses, plus the generation they belong to"""
+        now = time.monotonic()
+        values = []
+        with self.lock:
+            for key in keys:
+                entry = self.entries.get(key)
+                if entry is not None and self.ttl is not None and now - entry[1] > self.ttl:
+                    del self.entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    self.misses += 1
+                    values.append(None)
+                else:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    values.append(entry[0])
+            return values, self.generation
+
+    def put_many(self, keys, values, generation):
+        """Store values unless the cache was cleared since generation was read"""
+        now = time.monotonic()
+        with self.lock:
+            if generation != self.generation:
+                return
+            for key, value in zip(keys, values):
+                self.entries[key] = (value, now)
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry, e.g. after the underlying models changed"""
+        with self.lock:
+            self.entries.clear()
+            self.generation += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,125 @@
+import itertools
+import time
+
+import numpy as np
+
+# Discrete axes are indexed directly; is_weekend is derived from day_of_week
+DISCRETE_AXES = {
+    'hour': np.arange(24),
+    'day_of_week': np.arange(7),
+    'event_flag': np.arange(2),
+    'rush_hour': np.arange(2)
+}
+
+# Continuous axes are interpolated linearly between these points. The forest
+# leans almost entirely on avg_speed and its prediction steps there are where
+# interpolation goes wrong, so speed gets a 0.25 mph axis; at 5 mph the
+# measured max error was ~300 vehicles/hour, at 0.25 mph it is ~70.
+# Temperature and humidity barely move the forest, so they get the coarsest axes.
+DEFAULT_CONTINUOUS_AXES = {
+    'rain_intensity': np.array([0.0, 0.25, 0.5, 0.75, 1.0, 1.5]),
+    'temperature': np.array([0.0, 25.0, 50.0]),
+    'humidity': np.array([20.0, 100.0]),
+    'avg_speed': np.linspace(10.0, 60.0, 201)
+}
+
+# Same column order as ml_models.FEATURE_COLUMNS
+FEATURE_ORDER = ['hour', 'day_of_week', 'is_weekend', 'rain_intensity',
+                 'temperature', 'humidity', 'event_flag', 'rush_hour', 'avg_speed']
+
+class PredictionGrid:
+    """Precomputed model output over the hot region of the feature space
+
+    The table holds one float32 prediction per combination of the discrete
+    axes and the continuous grid points. Queries index the discrete axes
+    and interpolate multilinearly over the continuous ones, so answering a
+    request is a handful of array lookups no matter how big the model is.
+    """
+
+    def __init__(self, table, continuous_axes, max_error=None, build_seconds=None):
+        self.table = table
+        self.continuous_axes = continuous_axes
+        self.max_error = max_error
+        self.build_seconds = build_seconds
+
+        self.flat_table = table.ravel()
+        self.strides = np.array(table.strides) // table.itemsize
+        # Every corner of the interpolation cell as (bit per continuous axis, flat offset)
+        n_discrete = len(DISCRETE_AXES)
+        self.corner_bits = np.array(list(itertools.product((0, 1), repeat=len(continuous_axes))))
+        self.corner_offsets = self.corner_bits @ self.strides[n_discrete:]
+        self.discrete_columns = [FEATURE_ORDER.index(name) for name in DISCRETE_AXES]
+        self.discrete_max = np.array([points[-1] for points in DISCRETE_AXES.values()])
+        self.continuous_columns = [FEATURE_ORDER.index(name) for name in continuous_axes]
+
+    @classmethod
+    def build(cls, predict_fn, continuous_axes=None, chunk_size=100000, n_check=2000, random_state=0):
+        """Evaluate predict_fn over the grid and measure the interpolation error
+
+        predict_fn takes an (N, 9) matrix in FEATURE_ORDER and returns N
+        predictions. The maximum absolute error against predict_fn is measured
+        on n_check random in-range scenarios and stored as max_error.
+        """
+        start = time.perf_counter()
+        axes = {name: np.asarray(points, dtype=np.float64)
+                for name, points in (continuous_axes or DEFAULT_CONTINUOUS_AXES).items()}
+        for name, points in axes.items():
+            if len(points) < 2 or np.any(np.diff(points) <= 0):
+                raise ValueError(f"Grid axis {name} needs at least two increasing points")
+        all_axes = {**DISCRETE_AXES, **axes}
+        shape = tuple(len(points) for points in all_axes.values())
+
+        mesh = np.meshgrid(*all_axes.values(), indexing='ij')
+        columns = {name: grid.ravel() for name, grid in zip(all_axes, mesh)}
+        columns['is_weekend'] = (columns['day_of_week'] >= 5).astype(np.float64)
+        X = np.column_stack([columns[name] for name in FEATURE_ORDER])
+
+        values = np.empty(len(X), dtype=np.float32)
+        for offset in range(0, len(X), chunk_size):
+            values[offset:offset + chunk_size] = predict_fn(X[offset:offset + chunk_size])
+
+        grid = cls(values.reshape(shape), axes)
+        grid.max_error = grid.measure_error(predict_fn, n_check, random_state)
+        grid.build_seconds = time.perf_counter() - start
+        return grid
+
+    @property
+    def nbytes(self):
+        return self.table.nbytes
+
+    def measure_error(self, predict_fn, n_samples=2000, random_state=0):
+        """Maximum absolute difference from predict_fn on random in-range scenarios"""
+        rng = np.random.default_rng(random_state)
+        columns = {name: rng.choice(points, n_samples).astype(np.float64)
+                   for name, points in DISCRETE_AXES.items()}
+        for name, points in self.continuous_axes.items():
+            columns[name] = rng.uniform(points[0], points[-1], n_samples)
+        columns['is_weekend'] = (columns['day_of_week'] >= 5).astype(np.float64)
+        X = np.column_stack([columns[name] for name in FEATURE_ORDER])
+        return float(np.max(np.abs(self.predict(X) - predict_fn(X))))
+
+    def predict(self, X):
+        """Interpolated predictions for an (N, 9) matrix in FEATURE_ORDER"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        discrete = np.rint(X[:, self.discrete_columns]).astype(np.intp)
+        discrete = np.clip(discrete, 0, self.discrete_max)
+        base = discrete @ self.strides[:len(self.discrete_columns)]
+
+        n_axes = len(self.continuous_columns)
+        lower = np.empty((len(X), n_axes), dtype=np.intp)
+        weights = np.empty((len(X), n_axes, 2))
+        for axis, (column, points) in enumerate(zip(self.continuous_columns, self.continuous_axes.values())):
+            values = np.clip(X[:, column], points[0], points[-1])
+            i = np.clip(np.searchsorted(points, values, side='right') - 1, 0, len(points) - 2)
+            w = (values - points[i]) / (points[i + 1] - points[i])
+            lower[:, axis] = i
+            weights[:, axis, 0] = 1 - w
+            weights[:, axis, 1] = w
+        base += lower @ self.strides[len(self.discrete_columns):]
+
+        corner_weights = weights[:, np.arange(n_axes), self.corner_bits].prod(axis=2)
+        corner_values = self.flat_table[base[:, None] + self.corner_offsets]
+        return (corner_weights * corner_values).sum(axis=1)
@@ -0,0 +1,83 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from tree_engine import ForestEngine
+
+SEGMENT_INDEX = 'index.json'
+
+class SegmentModelStore:
+    """Per-segment forests on disk, loaded on demand into a memory-bounded LRU
+
+    Each segment (or segment cluster) has its own ForestEngine directory
+    and an entry in index.json. get() returns None for segments without a
+    model, so callers can fall back to the global model. Loaded engines
+    are kept while their total size stays within memory_budget bytes; the
+    least recently used ones are dropped first.
+    """
+
+    def __init__(self, directory, memory_budget=64 * 2**20):
+        self.directory = directory
+        self.memory_budget = memory_budget
+        with open(os.path.join(directory, SEGMENT_INDEX)) as f:
+            self.index = json.load(f)['segments']
+        self.loaded = OrderedDict()
+        self.loaded_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self.fallbacks = 0
+
+    def __contains__(self, segment):
+        return str(segment) in self.index
+
+    def get(self, segment):
+        """Engine for segment, loading it if needed; None if the segment has no model"""
+        key = str(segment)
+        with self.lock:
+            if key not in self.index:
+                self.fallbacks += 1
+                return None
+            if key in self.loaded:
+                self.loaded.move_to_end(key)
+                self.hits += 1
+                return self.loaded[key]
+
+            engine = ForestEngine.load(os.path.join(self.directory, self.index[key]['path']), mmap_mode=None)
+            self.loads += 1
+            # An engine bigger than the whole budget is served once but never kept
+            if engine.nbytes <= self.memory_budget:
+                while self.loaded_bytes + engine.nbytes > self.memory_budget:
+                    _, evicted = self.loaded.popitem(last=False)
+                    self.loaded_bytes -= evicted.nbytes
+                    self.evictions += 1
+                self.loaded[key] = engine
+                self.loaded_bytes += engine.nbytes
+            return engine
+
+    @staticmethod
+    def save(directory, engines, details=None):
+        """Write one engine directory per segment plus the index"""
+        os.makedirs(directory, exist_ok=True)
+        index = {}
+        for segment, engine in engines.items():
+            key = str(segment)
+            engine.save(os.path.join(directory, key))
+            index[key] = {'path': key, 'bytes': int(engine.nbytes), **(details or {}).get(segment, {})}
+        with open(os.path.join(directory, SEGMENT_INDEX), 'w') as f:
+            json.dump({'segments': index}, f, indent=2)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'segments': len(self.index),
+                'loaded': len(self.loaded),
+                'loaded_bytes': self.loaded_bytes,
+                'memory_budget': self.memory_budget,
+                'hits': self.hits,
+                'loads': self.loads,
+                'evictions': self.evictions,
+                'fallbacks': self.fallbacks
+            }
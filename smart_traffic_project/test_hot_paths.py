@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Checks for the exactness claims of the serving and training hot paths
+
+    ForestEngine           predicts what the scikit-learn forest predicts
+    PredictionCache        never serves a prediction from swapped-out models
+    get_forest_engine      never keeps an engine built from a forest swapped out meanwhile
+    PredictionGrid         over its max_error budget, the compiled forest answers instead
+    ModelRegistry          a failed save publishes nothing and leaves CURRENT alone
+    evaluate_on_dataset    re-scoring loaded models on their own dataset gives the training metrics
+    generate_traffic_shards  writes the same bytes whatever the worker count
+    PolynomialRegression   predicts what LinearRegression on PolynomialFeatures predicts
+    RegressionMetrics      accumulated over chunks equals scikit-learn's metrics on the whole set
+    ApproximateKNNRegressor  probing every cell predicts what KNeighborsRegressor predicts
+    train_all_models       parallel=True gives the same models as the serial run;
+                           a sampled retrain publishes no stale horizon model
+    horizon_targets        interpolates linearly between the records around each horizon
+
+Each check trains on a small generated dataset in a temporary directory.
+Runs under pytest, or directly:
+
+    python test_hot_paths.py
+"""
+
+import os
+import sys
+import tempfile
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, PROJECT_DIR)
+
+import numpy as np
+
+from data_generator import generate_traffic_dataset, generate_traffic_shards
+from ml_models import (FEATURE_COLUMNS, FOREST_REFRESH_ROWS, HORIZON_MODEL_NAME, MODEL_NAMES, TrafficPredictor,
+                       horizon_targets)
+from tree_engine import ForestEngine
+
+TEST_ROWS = 2000
+
+def write_dataset(directory, seed=42):
+    path = os.path.join(directory, f'traffic_data_{seed}.csv')
+    generate_traffic_dataset(TEST_ROWS, seed=seed).to_csv(path, index=False)
+    return path
+
+def train(directory, data_path, parallel=False, **options):
+    predictor = TrafficPredictor(registry_dir=os.path.join(directory, 'model_registry'), **options)
+    predictor.load_data(data_path, use_cache=False)
+    predictor.train_all_models(parallel=parallel)
+    return predictor
+
+def query_rows(n=200, seed=0):
+    return generate_traffic_dataset(n, seed=seed)[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+
+def test_forest_engine_matches_sklearn():
+    from sklearn.ensemble import RandomForestRegressor
+
+    df = generate_traffic_dataset(TEST_ROWS)
+    forest = RandomForestRegressor(n_estimators=20, max_depth=12, random_state=42)
+    forest.fit(df[FEATURE_COLUMNS].to_numpy(dtype=np.float64), df['traffic_flow'])
+    X = query_rows()
+    engine = ForestEngine.from_estimator(forest)
+    assert np.abs(engine.predict(X) - forest.predict(X)).max() < 1e-9
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine.save(directory)
+        mapped = ForestEngine.load(directory, mmap_mode='r')
+        assert np.abs(mapped.predict(X) - forest.predict(X)).max() < 1e-9
+
+def test_cache_invalidates_on_model_swap():
+    with tempfile.TemporaryDirectory() as directory:
+        first = train(directory, write_dataset(directory, seed=1))
+        first_version = first.save_models()
+        second = train(directory, write_dataset(directory, seed=2))
+        second_version = second.save_models()
+
+        serving = TrafficPredictor(registry_dir=first.registry.root, backend='compiled', cache_size=1000)
+        serving.load_models(version=first_version)
+        # The cache serves predictions for rows snapped onto its quantization grid
+        X, _ = serving.prediction_cache.quantize(query_rows())
+        serving.predict_traffic_batch(X)
+        assert np.allclose(serving.predict_traffic_batch(X), first.predict_traffic_batch(X), rtol=0, atol=1e-9)
+        assert serving.prediction_cache.stats()['hits'] == len(X)
+
+        serving.load_models(version=second_version)
+        swapped = serving.predict_traffic_batch(X)
+        assert np.allclose(swapped, second.predict_traffic_batch(X), rtol=0, atol=1e-9)
+        assert not np.allclose(swapped, first.predict_traffic_batch(X))
+
+        # A value computed before a clear() is never stored afterwards
+        cache = serving.prediction_cache
+        _, keys = cache.quantize(X[:1])
+        _, generation = cache.get_many(keys)
+        cache.clear()
+        cache.put_many(keys, [123.0], generation)
+        assert cache.get_many(keys)[0] == [None]
+
+def test_engine_built_across_refresh_is_not_kept():
+    with tempfile.TemporaryDirectory() as directory:
+        predictor = train(directory, write_dataset(directory), backend='compiled')
+        observed = generate_traffic_dataset(FOREST_REFRESH_ROWS, seed=7)
+        stale_forest = predictor.models['Random Forest']
+
+        def build():
+            # A request thread is still building from the old forest when a refresh swaps it out
+            engine = ForestEngine.from_estimator(stale_forest)
+            assert predictor.partial_fit(observed[FEATURE_COLUMNS], observed['traffic_flow'])['forest_refreshed']
+            return engine
+
+        stale_engine = predictor._serving_artifact('forest_engine', build)
+        assert predictor.forest_engine is None
+        X = query_rows()
+        assert not np.allclose(stale_engine.predict(X), predictor.models['Random Forest'].predict(X))
+        assert np.abs(predictor.get_forest_engine().predict(X) - predictor.models['Random Forest'].predict(X)).max() < 1e-9
+
+def test_grid_over_budget_falls_back_to_compiled():
+    from prediction_grid import DEFAULT_CONTINUOUS_AXES
+
+    # The 5 mph speed axis the grid used to have is off by a few hundred vehicles/hour
+    coarse_axes = {**DEFAULT_CONTINUOUS_AXES, 'avg_speed': np.linspace(10.0, 60.0, 11)}
+    with tempfile.TemporaryDirectory() as directory:
+        predictor = train(directory, write_dataset(directory), backend='grid', grid_axes=coarse_axes,
+                          grid_max_error=1)
+        X = query_rows()
+        grid = predictor.get_prediction_grid()
+        assert grid.max_error > predictor.grid_max_error and not predictor.grid_within_budget()
+        forest = np.maximum(predictor.models['Random Forest'].predict(X), 0)
+        assert np.abs(predictor.predict_traffic_batch(X) - forest).max() < 1e-9
+
+        predictor.grid_max_error = None
+        assert predictor.grid_within_budget()
+        assert np.array_equal(predictor.predict_traffic_batch(X), np.maximum(grid.predict(X), 0))
+
+def test_failed_save_publishes_nothing():
+    with tempfile.TemporaryDirectory() as directory:
+        predictor = train(directory, write_dataset(directory))
+        version = predictor.save_models()
+        registry = predictor.registry
+
+        # An artifact that cannot be pickled makes save_models fail halfway
+        predictor.models['Linear Regression'] = lambda X: X
+        try:
+            predictor.save_models()
+        except Exception:
+            pass
+        else:
+            raise AssertionError("save_models should have failed")
+        assert registry.versions() == [version]
+        assert registry.current_version() == version
+        assert not [name for name in os.listdir(registry.root) if name.startswith('.staging-')]
+
+        # Two writers publishing at once get distinct versions
+        staged = [registry.create_staging(), registry.create_staging()]
+        published = [registry.publish(path, activate=False) for path in staged]
+        assert len(set(published)) == 2 and version not in published
+        assert registry.current_version() == version
+
+def test_reevaluation_reproduces_training_metrics():
+    with tempfile.TemporaryDirectory() as directory:
+        data_path = write_dataset(directory)
+        trained = train(directory, data_path)
+        version = trained.save_models()
+
+        loaded = TrafficPredictor(registry_dir=trained.registry.root)
+        loaded.load_models(version=version)
+        loaded.evaluate_on_dataset(data_path)
+        assert not loaded.metrics_are_stale(data_path)
+        for name in MODEL_NAMES:
+            for metric, value in trained.results[name].items():
+                assert np.isclose(loaded.results[name][metric], value, rtol=1e-9), (name, metric)
+        for minutes, scores in trained.horizon_results.items():
+            assert np.allclose(list(loaded.horizon_results[minutes].values()), list(scores.values()), rtol=1e-9)
+
+def test_shards_identical_across_worker_counts():
+    with tempfile.TemporaryDirectory() as directory:
+        outputs = []
+        for workers in (1, 3):
+            paths = generate_traffic_shards(50_000, os.path.join(directory, f'workers{workers}'),
+                                            shard_size=16_384, chunk_size=4096, workers=workers)
+            outputs.append(b''.join(open(path, 'rb').read() for path in paths))
+        assert outputs[0] == outputs[1]
+
+        # ...and concatenated they are the in-memory dataset
+        import pandas as pd
+
+        expected_path = os.path.join(directory, 'expected.csv')
+        generate_traffic_dataset(50_000).to_csv(expected_path, index=False)
+        shards = pd.concat([pd.read_csv(path) for path in paths], ignore_index=True)
+        pd.testing.assert_frame_equal(shards, pd.read_csv(expected_path))
+
+def test_polynomial_regression_matches_sklearn():
+    from sklearn.linear_model import LinearRegression
+    from sklearn.preprocessing import PolynomialFeatures, StandardScaler
+    from polynomial_regression import PolynomialRegression
+
+    df = generate_traffic_dataset(20_000)
+    # float64 throughout, so the reference fit is exact
+    X = df[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    scaler = StandardScaler().fit(X)
+    X = scaler.transform(X)
+    # Several chunks, the last one partial
+    chunked = PolynomialRegression(chunk_rows=6000).fit(X, df['traffic_flow'])
+    expansion = PolynomialFeatures(degree=2, include_bias=False)
+    exact = LinearRegression().fit(expansion.fit_transform(X), df['traffic_flow'])
+    X_query = scaler.transform(query_rows())
+    assert np.abs(chunked.predict(X_query) - exact.predict(expansion.transform(X_query))).max() < 0.01
+
+def test_streamed_metrics_match_sklearn():
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+    from evaluation import RegressionMetrics, evaluate
+
+    rng = np.random.default_rng(0)
+    y_true = 400 + 150 * rng.standard_normal((5000, 4))
+    y_pred = y_true + 30 * rng.standard_normal(y_true.shape)
+    expected = {
+        'MAE': mean_absolute_error(y_true, y_pred, multioutput='raw_values'),
+        'RMSE': np.sqrt(mean_squared_error(y_true, y_pred, multioutput='raw_values')),
+        'R2': r2_score(y_true, y_pred, multioutput='raw_values')
+    }
+    # Uneven chunks, including an empty one
+    metrics = RegressionMetrics()
+    for start, stop in [(0, 1), (1, 1), (1, 1234), (1234, 4999), (4999, 5000)]:
+        metrics.update(y_true[start:stop], y_pred[start:stop])
+    for name, values in metrics.result().items():
+        assert np.allclose(values, expected[name], rtol=1e-10), name
+
+    class Fixed:
+        def predict(self, rows):
+            return y_pred[rows[:, 0].astype(int), 0]
+
+    rows = np.arange(len(y_true), dtype=np.float64)[:, None]
+    streamed, _ = evaluate(Fixed(), rows, y_true[:, 0], chunk_rows=777)
+    for name, value in streamed.items():
+        assert np.isclose(value, expected[name][0], rtol=1e-10), name
+
+def test_exhaustive_approximate_knn_matches_sklearn():
+    from sklearn.neighbors import KNeighborsRegressor
+    from sklearn.preprocessing import StandardScaler
+    from knn_index import ApproximateKNNRegressor
+
+    df = generate_traffic_dataset(20_000)
+    X = df[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    y = df['traffic_flow'].to_numpy(dtype=np.float64)
+    scaler = StandardScaler().fit(X)
+    X, X_query = scaler.transform(X), scaler.transform(query_rows(1000, seed=3))
+    for weights in ('uniform', 'distance'):
+        approximate = ApproximateKNNRegressor(weights=weights, n_cells=32, n_probe=32).fit(X, y)
+        exact = KNeighborsRegressor(n_neighbors=5, weights=weights).fit(X, y)
+        # The index keeps float32 points, so distance weights differ in the last few bits
+        assert np.abs(approximate.predict(X_query) - exact.predict(X_query)).max() < 0.01, weights
+
+def test_parallel_training_matches_serial():
+    with tempfile.TemporaryDirectory() as directory:
+        data_path = write_dataset(directory)
+        serial = train(directory, data_path)
+        parallel = train(directory, data_path, parallel=True)
+        X = query_rows()
+        X_scaled = serial.scaler.transform(X)
+        assert np.array_equal(X_scaled, parallel.scaler.transform(X))
+        for name in MODEL_NAMES:
+            assert serial.results[name] == parallel.results[name], name
+            inputs = X if name in ('Decision Tree', 'Random Forest') else X_scaled
+            assert np.array_equal(serial.models[name].predict(inputs), parallel.models[name].predict(inputs)), name
+
+def test_sampled_retrain_drops_horizon_model():
+    with tempfile.TemporaryDirectory() as directory:
+        data_path = write_dataset(directory)
+        full = train(directory, data_path)
+        assert full.has_horizon_model() and full.horizon_results
+        full.save_models()
+
+        # A sampled dataset cannot give future targets, so the loaded version's horizon model must go
+        predictor = TrafficPredictor(registry_dir=full.registry.root)
+        assert predictor.load_models() and predictor.has_horizon_model()
+        predictor.load_data(data_path, max_rows=TEST_ROWS // 2)
+        predictor.train_all_models()
+        assert not predictor.has_horizon_model() and predictor.horizon_results == {}
+
+        version = predictor.save_models()
+        manifest = predictor.registry.manifest(version)
+        assert HORIZON_MODEL_NAME not in manifest['models'] and manifest['horizons'] == []
+        assert predictor.load_models(version=version)
+        assert not predictor.has_horizon_model() and predictor.horizon_results == {}
+
+def test_horizon_targets_interpolate():
+    flow = np.random.default_rng(0).uniform(0, 800, 50)
+    # 10-minute records: +5 falls halfway between records, +30 lands on one
+    targets = horizon_targets(flow, (5, 15, 30), minutes_per_record=10)
+    assert targets.shape == (47, 3)
+    assert np.allclose(targets[:, 0], (flow[:47] + flow[1:48]) / 2)
+    assert np.allclose(targets[:, 1], (flow[1:48] + flow[2:49]) / 2)
+    assert np.array_equal(targets[:, 2], flow[3:50])
+
+    # A linear series is reproduced exactly at any offset
+    minutes = np.arange(100) * 5.0
+    assert np.allclose(horizon_targets(3 * minutes + 7, (7, 60), 5), 3 * (minutes[:88, None] + [7, 60]) + 7)
+    assert horizon_targets(flow[:3], (30,), 10).shape == (0, 1)
+
+def main():
+    checks = [test_forest_engine_matches_sklearn, test_cache_invalidates_on_model_swap,
+              test_engine_built_across_refresh_is_not_kept, test_grid_over_budget_falls_back_to_compiled,
+              test_failed_save_publishes_nothing, test_reevaluation_reproduces_training_metrics,
+              test_shards_identical_across_worker_counts,
+              test_polynomial_regression_matches_sklearn, test_streamed_metrics_match_sklearn,
+              test_exhaustive_approximate_knn_matches_sklearn,
+              test_parallel_training_matches_serial,
+              test_sampled_retrain_drops_horizon_model, test_horizon_targets_interpolate]
+    failed = 0
+    for check in checks:
+        try:
+            check()
+            print(f"PASS {check.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"FAIL {check.__name__}: {e!r}")
+    print(f"\n{len(checks) - failed}/{len(checks)} checks passed")
+    return failed == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -38,7 +38,7 @@ def main():
     
     required_files = [
         'traffic_data.csv',
-        'trained_models.pkl',
+        'model_registry/CURRENT',
         'frontend/index.html',
         'backend/api.py'
     ]
@@ -0,0 +1,129 @@
+import os
+
+import numpy as np
+
+# Arrays written by ForestEngine.save, one uncompressed .npy file each
+ENGINE_ARRAYS = ('feature', 'threshold', 'left', 'right', 'children', 'value', 'roots')
+
+class ForestEngine:
+    """Array-backed evaluator for a fitted sklearn tree ensemble
+
+    All trees are flattened into one set of contiguous node arrays. Leaves
+    point back at themselves, so every row can be walked a fixed number of
+    steps (the deepest tree's depth) with plain numpy indexing and no
+    per-node branching. Multi-output forests keep one value column per
+    output.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, children=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        # left/right interleaved so a step is children[2 * node + go_right]
+        if children is None:
+            children = np.stack([left, right], axis=1).ravel()
+        self.children = children
+
+    @classmethod
+    def from_estimator(cls, estimator):
+        """Flatten a RandomForestRegressor (or a single DecisionTreeRegressor)
+
+        value has shape (n_nodes,) for single-output models and
+        (n_nodes, n_outputs) otherwise.
+        """
+        trees = getattr(estimator, 'estimators_', [estimator])
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for tree in trees:
+            tree_ = tree.tree_
+            n_nodes = tree_.node_count
+            node_ids = np.arange(n_nodes)
+            is_leaf = tree_.children_left == -1
+
+            features.append(np.where(is_leaf, 0, tree_.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree_.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree_.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree_.children_right) + offset)
+            value = tree_.value.reshape(n_nodes, -1)
+            values.append(value if tree_.n_outputs > 1 else value[:, 0])
+            roots.append(offset)
+
+            offset += n_nodes
+            max_depth = max(max_depth, tree_.max_depth)
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            left=np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp),
+            right=np.ascontiguousarray(np.concatenate(rights), dtype=np.intp),
+            value=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth
+        )
+
+    def save(self, directory):
+        """Write the node arrays as plain .npy files that load() can memory-map"""
+        os.makedirs(directory, exist_ok=True)
+        for name in ENGINE_ARRAYS:
+            np.save(os.path.join(directory, f'{name}.npy'), getattr(self, name))
+        np.save(os.path.join(directory, 'max_depth.npy'), np.array(self.max_depth))
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """Load arrays saved by save(); with mmap_mode='r' processes share the pages"""
+        arrays = {
+            name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode).view(np.ndarray)
+            for name in ENGINE_ARRAYS
+        }
+        max_depth = int(np.load(os.path.join(directory, 'max_depth.npy')))
+        return cls(max_depth=max_depth, **arrays)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in ENGINE_ARRAYS)
+
+    def leaf_values(self, X):
+        """Per-tree predictions, shape (n_rows, n_trees) or (n_rows, n_trees, n_outputs)"""
+        # sklearn compares float32 inputs against float64 thresholds; do the same
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        flat_X = np.ascontiguousarray(X).ravel()
+        row_offsets = (np.arange(len(X)) * X.shape[1])[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        for _ in range(self.max_depth):
+            go_right = flat_X[row_offsets + self.feature[nodes]] > self.threshold[nodes]
+            nodes = self.children[2 * nodes + go_right]
+        return self.value[nodes]
+
+    def predict(self, X):
+        """Mean prediction over all trees, one value (or one row of outputs) per input row"""
+        return self.leaf_values(X).mean(axis=1)
+
+    def predict_spread(self, X, quantiles=None):
+        """Mean, standard deviation and optional quantiles of the per-tree predictions
+
+        All come from one leaf_values pass. Quantiles are returned with the
+        quantile axis last, e.g. (n_rows, len(quantiles)), or None.
+        """
+        leaves = self.leaf_values(X)
+        spread = None
+        if quantiles is not None:
+            quantiles = np.atleast_1d(np.asarray(quantiles, dtype=np.float64))
+            spread = np.moveaxis(np.quantile(leaves, quantiles, axis=1), 0, -1)
+        return leaves.mean(axis=1), leaves.std(axis=1), spread
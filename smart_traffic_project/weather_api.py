@@ -1,4 +1,3 @@
-import requests
 import json
 from datetime import datetime
 
@@ -15,6 +14,9 @@ class WeatherAPI:
                 # Return mock data for demo purposes
                 return self._get_mock_weather_data()
             
+            # Only needed for live data; the demo path never pays for the import
+            import requests
+            
             params = {
                 'q': city,
                 'appid': self.api_key,